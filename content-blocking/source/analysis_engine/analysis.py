@@ -24,12 +24,7 @@ from source.constants import GENERAL_ERROR
 
 from source.analysis_engine.experimental_analysis import add_subtrees, analyse_subtrees_blocking
 from source.analysis_engine.experimental_analysis import calculate_blocked_who_brings_children
-from source.analysis_engine.experimental_analysis import calculate_average_block_level
-from source.analysis_engine.requests_analysis import calculate_total_blocked_requests
-from source.analysis_engine.requests_analysis import calculate_really_blocked_requests
-from source.analysis_engine.fingerprinting_analysis import calculate_directly_blocked_fpd_attempts
-from source.analysis_engine.fingerprinting_analysis import calculate_total_blocked_fpd_attempts
-from source.analysis_engine.fingerprinting_analysis import calculate_total_fpd_attempts
+from source.analysis_engine.experimental_analysis import average_of_block_levels
 from source.analysis_engine.analysis_utils import get_directly_blocked_tree
 from source.analysis_engine.analysis_utils import get_transitively_blocked_tree
 from source.analysis_engine.analysis_utils import process_firefox_console_output
@@ -51,27 +46,31 @@ def simulate_blocking(request_tree: RequestTree, blocked_resources: list[str]) -
 
     # Get number of total resources
     total_requested = len(request_tree.get_all_requests())
-    total_fpd_attempts = calculate_total_fpd_attempts(request_tree)
 
     # Project the resource blocking into trees
     directly_blocked_tree = get_directly_blocked_tree(request_tree, blocked_resources)
     transitively_blocked_tree = get_transitively_blocked_tree(request_tree, blocked_resources)
 
+    # Both blockings are projected into the same tree, so compute all its statistics
+    # in a single walk instead of walking it once for each of them
+    tree_stats = transitively_blocked_tree.compute_stats()
+    total_fpd_attempts = tree_stats["total_fpd_attempts"]
+
     # Calculate request blocking
-    total_blocked = calculate_total_blocked_requests(transitively_blocked_tree)
-    really_blocked_nodes = calculate_really_blocked_requests(directly_blocked_tree)
+    total_blocked = tree_stats["total_blocked"]
+    really_blocked_nodes = tree_stats["firstly_blocked"]
     directly_blocked = len(really_blocked_nodes)
     blocked_transitively = total_blocked - directly_blocked
 
     # Calculate fp blocking
-    direct_fpd_blocked = calculate_directly_blocked_fpd_attempts(directly_blocked_tree)
-    total_fpd_blocked = calculate_total_blocked_fpd_attempts(transitively_blocked_tree)
+    direct_fpd_blocked = tree_stats["first_blocked_fpd_attempts"]
+    total_fpd_blocked = tree_stats["total_blocked_fpd_attempts"]
     transitive_fpd_blocked = add_substract_fp_attempts(total_fpd_blocked, direct_fpd_blocked,\
                                                         add=False)
 
     # Calculate experimental metrics
     blocked_subtrees_data = analyse_subtrees_blocking(directly_blocked_tree)
-    average_block_level = calculate_average_block_level(directly_blocked_tree)
+    average_block_level = average_of_block_levels(tree_stats["blocked_at_levels"])
     blocked_with_children = calculate_blocked_who_brings_children(really_blocked_nodes)
 
     return {
@@ -18,6 +18,7 @@
 
 # Built-in modules
 import re
+from typing import Iterator
 
 # Custom modules
 from source.traffic_parser.request_tree import RequestTree
@@ -36,12 +37,7 @@ def get_directly_blocked_tree(request_tree: RequestTree, blocked_resources: list
         RequestTree: Tree with blocked nodes (those matching blocked_resources)
     """
     # Block only parent nodes to obtain how many would be observed without request chain
-    for resource in blocked_resources:
-        nodes_with_resource = request_tree.find_nodes(resource)
-        for node in nodes_with_resource:
-
-            # Mark initial node as blocked
-            node.block()
+    request_tree.block_urls(blocked_resources)
 
     return request_tree
 
@@ -57,63 +53,44 @@ def get_transitively_blocked_tree(request_tree: RequestTree, blocked_resources:
     Returns:
         RequestTree: Tree with transitively blocked nodes (if parent was blocked, so was child)
     """
-    # Go through each blocked resource and check if its present in the tree
-    for resource in blocked_resources:
-        nodes_with_resource = request_tree.find_nodes(resource)
-        for parent_node in nodes_with_resource:
-
-            # Mark initial node as blocked
-            parent_node.block()
-
-            # Also mark all children as blocked
-            child_nodes = parent_node.get_all_children_nodes()
-
-            # If parent was repeated (lowerbound calculation), mark all children as repeated
-            if parent_node.repeated:
-                for node in child_nodes:
-                    node.repeated = True
-
-            # Try to block all child nodes transitively
-            for node in child_nodes:
-                node.block(transitive_block=True)
+    # Block each blocked resource present in the tree and try to block its children as well
+    request_tree.block_urls(blocked_resources, transitive=True)
 
     return request_tree
 
-def parse_console_logs_chrome(console_output: list[dict]) -> list[str]:
-    """Function to parse obtained console logs from Chrome
+def iter_blocked_pages_chrome(console_output: list[dict]) -> Iterator[str]:
+    """Generator lazily yielding resources blocked in the Chrome console logs
     
     Args:
         console_output: Console output logged from Chrome simulation
 
-    Returns:
-        list[str]: List of blocked resources
+    Yields:
+        str: URL of a blocked resource
     """
-    blocked_by_client_error = "ERR_BLOCKED_BY_CLIENT"
-    blocked_by_administrator_error = "ERR_BLOCKED_BY_ADMINISTRATOR"
-    error_length = len(blocked_by_client_error)
-    error_length_2 = len(blocked_by_administrator_error)
-
-    blocked_pages = []
+    blocked_errors = ("ERR_BLOCKED_BY_CLIENT", "ERR_BLOCKED_BY_ADMINISTRATOR")
 
     for report in console_output:
         # Only do anything if it was an error
         if report["level"] == "SEVERE":
             message = report["message"]
 
-            # Obtain the last part of the string w/ the error
-            last_part = message[-error_length:]
-            last_part_2 = message[-error_length_2:]
-
-            # It was blocked by client
-            if last_part == blocked_by_client_error or\
-                last_part_2 == blocked_by_administrator_error:
+            # It was blocked by client (the message ends with the error)
+            if message.endswith(blocked_errors):
 
                 # get the url of the resource - split by space and the first is url
-                parts_of_message = message.split(' ')
-                url = parts_of_message[0]
-                blocked_pages.append(url)
+                yield message.split(' ', 1)[0]
+
+def parse_console_logs_chrome(console_output: list[dict]) -> list[str]:
+    """Function to parse obtained console logs from Chrome
+    
+    Args:
+        console_output: Console output logged from Chrome simulation
 
-    return blocked_pages
+    Returns:
+        list[str]: List of blocked resources
+    """
+    # The blocked resources are iterated repeatedly (once per each tree), so materialize them
+    return list(iter_blocked_pages_chrome(console_output))
 
 def process_firefox_console_output(request_trees: dict, console_output: list) -> list:
     """Function to substract logged resources from all observed resources
@@ -216,8 +216,18 @@ def calculate_average_block_level(directly_blocked_tree: RequestTree) -> float:
     Returns:
         float: Calculate average block level
     """
-    average_block_levels = directly_blocked_tree.blocked_at_levels()
+    return average_of_block_levels(directly_blocked_tree.blocked_at_levels())
+
+def average_of_block_levels(block_levels: list[int]) -> float:
+    """Function to calculate average of the levels at which the first blocks were observed
+    
+    Args:
+        block_levels: Levels at which a blocked node was first encountered
+
+    Returns:
+        float: Calculate average block level
+    """
     average_block_level = 0
-    if average_block_levels:
-        average_block_level = sum(average_block_levels) / len(average_block_levels)
+    if block_levels:
+        average_block_level = sum(block_levels) / len(block_levels)
     return average_block_level
@@ -20,6 +20,9 @@
 GENERAL_ERROR = 1
 FILE_ERROR = 51
 
+# Minimal number of independent tasks for which it's worth it to process them in parallel
+PARALLEL_MIN_TASKS = 32
+
 # Paths - folders
 TRAFFIC_FOLDER = "./traffic/"
 RESULTS_FOLDER = "./results/"
@@ -42,6 +45,18 @@ FIREFOX_RESOURCE_LOGGER = FIREFOX_ADDONS_FOLDER + "firefox_resource_logger.xpi"
 # Paths - system
 HOSTS_FILE = "C:/Windows/System32/drivers/etc/hosts"
 
+# Capture filter for the DNS sniffer - only DNS responses (QR flag set, sent from port 53)
+# with at least one answer (ANCOUNT != 0), offsets are relative to the start of the UDP header.
+# libpcap can only index UDP headers over IPv4, so responses over IPv6 are only filtered
+# by the port, queries and empty answers among them are skipped when parsing the packets
+DNS_SNIFFER_FILTER = "(udp src port 53 and (udp[10] & 0x80) != 0 and udp[14:2] != 0)"\
+                     " or (ip6 and udp src port 53)"
+
+# Time (in seconds) without new packet after which all responses of a visit are considered
+# captured by the DNS sniffer, and the longest time to wait for it
+DNS_SNIFFER_DRAIN_INTERVAL = 0.25
+DNS_SNIFFER_MAX_DRAIN_TIME = 2
+
 # DNS server docker container name
 DNS_CONTAINER_NAME = "bind9"
 DNS_CONTAINER_IMAGE = "internetsystemsconsortium/bind9:9.20"
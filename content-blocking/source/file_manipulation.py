@@ -19,11 +19,26 @@
 # Built-in modules
 import json
 import os
-import re
+
+# 3rd-party modules
+# orjson is optional, it is only used to speed-up (de)serialization of large JSON files
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Custom modules
 from source.constants import FILE_ERROR, TRAFFIC_FOLDER, GENERAL_ERROR
 
+# Filename suffixes used to select the traffic files of each type, files of other types
+# (and the .empty placeholder) do not match
+# Traffic files are saved as <page number>_<traffic type>.json
+TRAFFIC_FILE_SUFFIXES = {
+    "fp": "_fp.json",
+    "dns": "_dns.json",
+    "network": "_network.json"
+}
+
 def load_pages() -> list[str]:
     """Function to load the page_list.txt file and return its content
     
@@ -33,11 +48,25 @@ def load_pages() -> list[str]:
     try:
         with open("page_list.txt", 'r', encoding='utf-8') as f:
             # strip newline characters at the end of each line
-            return [line[:-1] if line[-1] == '\n' else line for line in f.readlines()]
+            return f.read().splitlines()
     except OSError:
         print("Error reading the content of page_list.txt! Is the file present?")
         exit(FILE_ERROR)
 
+def parse_json(data: str | bytes):
+    """Function to parse JSON from a string that was not loaded from a file
+    
+    Args:
+        data: The JSON document, either as str or UTF-8 bytes
+
+    Returns:
+        Content of the parsed JSON
+    """
+    if orjson:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
 def load_json(path: str) -> dict:
     """Function to load a given JSON file and return its content as dict
     
@@ -48,6 +77,11 @@ def load_json(path: str) -> dict:
         dict: Content of the loaded json
     """
     try:
+        # orjson parses directly from the UTF-8 bytes
+        if orjson:
+            with open(path, 'rb') as f:
+                return orjson.loads(f.read())
+
         with open(path, 'r', encoding='utf-8') as f:
             data = json.load(f)
             return data
@@ -55,6 +89,27 @@ def load_json(path: str) -> dict:
         print("Error reading the content of " + path + "! Is the file present?")
         exit(FILE_ERROR)
 
+def dump_json(json_file, indent: bool = True, ensure_ascii: bool = False) -> bytes:
+    """Function to serialize given content as JSON encoded in UTF-8
+    
+    Args:
+        json_file: Content of the JSON to serialize
+        indent: Whether to indent the JSON by 4 spaces to be human-readable. Without
+            indentation, the JSON is written without any whitespace
+        ensure_ascii: Whether to escape non-ASCII characters
+
+    Returns:
+        bytes: JSON ready to be written into a file opened in binary mode
+    """
+    # orjson can only indent by 2 spaces and never escapes non-ASCII characters, so it is
+    # only used for the compact output, which is then the same as from the json module
+    if orjson and not indent and not ensure_ascii:
+        return orjson.dumps(json_file, option=orjson.OPT_NON_STR_KEYS)
+
+    if indent:
+        return json.dumps(json_file, ensure_ascii=ensure_ascii, indent=4).encode('utf-8')
+    return json.dumps(json_file, ensure_ascii=ensure_ascii, separators=(',', ':')).encode('utf-8')
+
 def save_json(json_file, path) -> None:
     """Function to save a given JSON file
     
@@ -63,8 +118,8 @@ def save_json(json_file, path) -> None:
         path: Where to save the file
     """
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(json_file, f, ensure_ascii=False, indent=4)
+        with open(path, 'wb') as f:
+            f.write(dump_json(json_file))
     except OSError:
         print("Error saving json into " + path + "!")
         exit(FILE_ERROR)
@@ -79,24 +134,14 @@ def get_traffic_files(traffic_type: str) -> list:
         list: List of files matching the given filter
     """
 
-    # Types of traffic files to ignore
-    inverse_regex = [r"fp", r"dns", r"network"]
+    # Obtain the filename suffix of the given type
+    suffix = TRAFFIC_FILE_SUFFIXES.get(traffic_type)
 
-    if traffic_type in inverse_regex:
-        # Remove given type of files from the inverse regex to obtain them
-        inverse_regex.remove(traffic_type)
-    else:
+    if suffix is None:
         print("Invalid traffic file type!")
         exit(GENERAL_ERROR)
 
-    # Append .empty file to not count it
-    inverse_regex.append(r"\.empty")
-
-    # Create the regex by adding '|' between the options
-    inverse_regex = '|'.join(inverse_regex)
-
     # Load the only the type of file we want from the traffic folder
-    files = [TRAFFIC_FOLDER + f for f in os.listdir(TRAFFIC_FOLDER)
-            if not re.search(inverse_regex, f)]
+    files = [TRAFFIC_FOLDER + f for f in os.listdir(TRAFFIC_FOLDER) if f.endswith(suffix)]
 
     return files
@@ -0,0 +1,51 @@
+# parallel.py
+# Helpers to process independent tasks in parallel using multiple processes
+# Copyright (C) 2025 Vojtěch Fiala
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Built-in modules
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterator
+
+# Custom modules
+from source.constants import PARALLEL_MIN_TASKS
+
+def parallel_map(function: Callable, items: list, initializer: Callable=None,\
+                 initargs: tuple=()) -> Iterator[Any]:
+    """Function to apply a function to each of the items using all available cores.
+    Results are yielded lazily in the order of the given items.
+    
+    Args:
+        function: Module-level function to apply to each item (must be picklable)
+        items: Independent items to process
+        initializer: Function called once in each worker process before processing the items,
+                     can be used to pass data shared by all the items only once
+        initargs: Arguments for the initializer
+
+    Returns:
+        Iterator: Results of the function for each of the items
+    """
+    # Starting the worker processes is not worth it for a few items or a single core
+    if len(items) < PARALLEL_MIN_TASKS or (os.cpu_count() or 1) < 2:
+        if initializer:
+            initializer(*initargs)
+        for item in items:
+            yield function(item)
+        return
+
+    with ProcessPoolExecutor(initializer=initializer, initargs=initargs) as executor:
+        yield from executor.map(function, items, chunksize=8)
@@ -110,18 +110,20 @@ class DNSRepeater:
             str: Zonefile generated as a string
         """
 
-        zone_file = \
-         ";\n" +\
-         "$TTL    604800\n" +\
-        f"@       IN      SOA     ownnstoavoidcollisions48a.{domain}.   root.{domain}. (\n" +\
-         "                 2013012110         ; Serial\n" +\
-         "                     604800         ; Refresh\n" +\
-         "                      86400         ; Retry\n" +\
-         "                    2419200         ; Expire\n" +\
-         "                     604800 )       ; Negative Cache TTL\n" +\
-         ";\n" +\
-        f"@       IN      NS      ownnstoavoidcollisions48a.{domain}.\n" +\
+        # Collect the lines and join them once at the end
+        zone_file = [
+         ";\n",
+         "$TTL    604800\n",
+        f"@       IN      SOA     ownnstoavoidcollisions48a.{domain}.   root.{domain}. (\n",
+         "                 2013012110         ; Serial\n",
+         "                     604800         ; Refresh\n",
+         "                      86400         ; Retry\n",
+         "                    2419200         ; Expire\n",
+         "                     604800 )       ; Negative Cache TTL\n",
+         ";\n",
+        f"@       IN      NS      ownnstoavoidcollisions48a.{domain}.\n",
          "ownnstoavoidcollisions48a       IN      A      127.0.0.1\n"
+        ]
 
         # Iterate over all subdomains and edit zonefile accordingly
         for (subdomain, record) in all_subdomains.items():
@@ -129,7 +131,7 @@ class DNSRepeater:
             # If there is some CNAME-type record, only take the first and add record
             if record.get("CNAME", []) != []:
                 first_cname = record["CNAME"][0]
-                zone_file += f"{subdomain}       IN      CNAME    {first_cname}.\n"
+                zone_file.append(f"{subdomain}       IN      CNAME    {first_cname}.\n")
 
                 # If I added CNAME, continue (cant have same A and CNAME)
                 continue
@@ -139,11 +141,11 @@ class DNSRepeater:
             if first_a:
                 first_a = first_a[0]
                 if domain == subdomain:
-                    zone_file += f"@       IN      A       {first_a}\n"
+                    zone_file.append(f"@       IN      A       {first_a}\n")
                 else:
-                    zone_file += f"{subdomain}       IN      A       {first_a}\n"
+                    zone_file.append(f"{subdomain}       IN      A       {first_a}\n")
 
-        return zone_file
+        return ''.join(zone_file)
 
     def prepare_config(self, dns_records: dict) -> None:
         """Method to create zone files in the configuration folder
@@ -153,35 +155,37 @@ class DNSRepeater:
             dns_records: All DNS records squashed together
         """
 
-        # Preserve the original config
-        with open(NAMED_CONF_FILE, 'r', encoding='utf-8') as f:
+        # Preserve the original config, it is only written back verbatim so keep the raw bytes
+        with open(NAMED_CONF_FILE, 'rb') as f:
             self.original_config = f.read()
 
         tar = tarfile.open(self.tar_path, mode='w')
         already_present = {}
         progress_printer = print_progress(len(dns_records.items()), "Generating zone files...")
         try:
-            # Prepare new zone for each record
-            for (key, value) in dns_records.items():
-                progress_printer()
-                zone_file = self.generate_zonefile(key, value)
-                zone_file_path = DNS_CONFIGURATION_FOLDER + key
-
-                # Write the file
-                with open(zone_file_path, 'w', encoding='utf-8', newline="") as f:
-                    f.write(zone_file)
-                    f.write("\n")
-
-                # Include it in named.conf
-                with open(NAMED_CONF_FILE, 'a', encoding='utf-8', newline="") as f:
+            # Include the zones in named.conf, keep it open for all of them
+            with open(NAMED_CONF_FILE, 'a', encoding='utf-8', newline="") as named_conf:
+
+                # Prepare new zone for each record
+                for (key, value) in dns_records.items():
+                    progress_printer()
+                    zone_file = self.generate_zonefile(key, value)
+                    zone_file_path = DNS_CONFIGURATION_FOLDER + key
+
+                    # Write the file
+                    with open(zone_file_path, 'w', encoding='utf-8', newline="") as f:
+                        f.write(zone_file)
+                        f.write("\n")
+
+                    # Include it in named.conf
                     if not already_present.get(key):
                         already_present[key] = True
                         zone_config = self.create_zone_config(domain=key)
-                        f.write(zone_config)
-                        f.write("\n")
+                        named_conf.write(zone_config)
+                        named_conf.write("\n")
 
-                # Add the zone to tmp tarfile
-                tar.add(zone_file_path, arcname=os.path.basename(zone_file_path))
+                    # Add the zone to tmp tarfile
+                    tar.add(zone_file_path, arcname=os.path.basename(zone_file_path))
         except Exception:
             # Remove all zone files and tar from folder and docker
             print("Removing existing zone files...")
@@ -192,7 +196,7 @@ class DNSRepeater:
                 if os.path.isfile(filename) and file != ".empty" and file != "named.conf":
                     os.remove(filename)
 
-            with open(NAMED_CONF_FILE, 'w', encoding='utf-8', newline="") as f:
+            with open(NAMED_CONF_FILE, 'wb') as f:
                 f.write(self.original_config)
 
         tar.close()
@@ -301,7 +305,7 @@ class DNSRepeater:
         os.system(rm_command)
 
         # Restore original named.conf
-        with open(NAMED_CONF_FILE, 'w', encoding='utf-8', newline="") as f:
+        with open(NAMED_CONF_FILE, 'wb') as f:
             f.write(self.original_config)
 
         # Upload named.conf to docker
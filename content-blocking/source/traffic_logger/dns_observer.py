@@ -16,23 +16,91 @@
 # If not, see <https://www.gnu.org/licenses/>.
 #
 
+# Built-in modules
+import time
+from functools import lru_cache
+
 # 3rd-party modules
 from scapy.packet import Packet
 from scapy.all import AsyncSniffer
-from scapy.layers.dns import DNSRR, DNS
+from scapy.error import Scapy_Exception
+from scapy.layers.dns import DNS
+
+# Custom modules
+from source.constants import DNS_SNIFFER_FILTER, DNS_SNIFFER_DRAIN_INTERVAL,\
+    DNS_SNIFFER_MAX_DRAIN_TIME
+
+# Resource record types, defined at: https://datatracker.ietf.org/doc/html/rfc1035#page-12
+DNS_TYPE_A = 1
+DNS_TYPE_CNAME = 5
+
+# Errors a malformed DNS packet can raise while being decoded
+MALFORMED_PACKET_ERRORS = (UnicodeDecodeError, IndexError, Scapy_Exception)
+
+@lru_cache(maxsize=4096)
+def split_domain(query_name: str) -> tuple[str, str]:
+    """Function to split address into the zone name and the rest of its subdomains.
+    Observed domains repeat a lot during a session, so the results are cached.
+
+    Args:
+        query_name: The domain name to split
+
+    Returns:
+        tuple:
+            - main_zone_name(str): 2nd and 1st level domain of the address,
+            for *test.example.com*, returns *example.com*
+            - subdomains(str): Rest of the subdomains, for *test.a.com*, returns *test*.
+            If there are no other subdomains, returns the zone name.
+            Single-label names are returned as both.
+    """
+    # Only the last two labels are needed separately (test.example.com = test, example, com)
+    rest, separator, top_level = query_name.rpartition('.')
+
+    # Single-label name (e.g. localhost), it is its own zone
+    if not separator:
+        return query_name, query_name
+
+    remain, separator, second_level = rest.rpartition('.')
+    main_zone_name = second_level + '.' + top_level
+
+    # If there were subdomains left, they are the key. Else, zone_name is the key.
+    subdomains = main_zone_name
+    if separator:
+        subdomains = remain
+
+    return main_zone_name, subdomains
+
+def decode_domain_name(name: bytes) -> str:
+    """Function to decode domain name from a DNS packet and remove the trailing (root) dot
+    
+    Args:
+        name: Domain name in the wire format, e.g. b'www.example.com.'
+
+    Returns:
+        str: Decoded domain name without the trailing dot, e.g. 'www.example.com'
+    """
+    # Labels are ASCII (IDNs are punycoded), a fully qualified name always ends with one dot
+    decoded_name = name.decode('ascii')
+    if decoded_name.endswith('.'):
+        decoded_name = decoded_name[:-1]
+
+    return decoded_name
 
 class DNSSniffer():
     def __init__(self):
         """Method to initialize the sniffer"""
 
         self.dns_responses = {}
-        self.sniffer = AsyncSniffer(filter="udp port 53", prn=self.store_packet, store=False)
+        self.sniffer = AsyncSniffer(filter=DNS_SNIFFER_FILTER, prn=self.store_packet, store=False)
         self.packets = []
 
+        # Number of malformed packets skipped in the last get_traffic call
+        self.skipped_packets = 0
+
     def start_sniffer(self) -> None:
         """Method to start the DNS sniffer"""
 
-        # Start sniffing on UDP port 53 (DNS)
+        # Start sniffing DNS responses on UDP port 53, queries are filtered out by the driver
         # Important: The observed DNS responses may include additional DNS traffic
         # which came from other programs running on the host machine -- shouldn't matter
         self.sniffer.start()
@@ -43,20 +111,55 @@ class DNSSniffer():
         if self.sniffer.running:
             self.sniffer.stop()
 
+    def wait_for_packets(self) -> None:
+        """Method to wait until the sniffer has stored the packets captured so far. The capture
+        thread stores packets with a delay, so the wait ends once no new packet has arrived
+        for DNS_SNIFFER_DRAIN_INTERVAL, at most after DNS_SNIFFER_MAX_DRAIN_TIME"""
+        if not self.sniffer.running:
+            return
+
+        deadline = time.time() + DNS_SNIFFER_MAX_DRAIN_TIME
+        packet_count = -1
+        while packet_count != len(self.packets) and time.time() < deadline:
+            packet_count = len(self.packets)
+            time.sleep(DNS_SNIFFER_DRAIN_INTERVAL)
+
     def store_packet(self, packet: Packet) -> None:
         """Method to store DNS packet into internal list"""
         self.packets.append(packet)
 
-    def get_traffic(self) -> dict:
-        """Method to obtain the saved DNS responses
+    def get_traffic(self, since: float | None = None) -> dict:
+        """Method to obtain the DNS responses saved since the last call. Parsed packets
+        are removed from the sniffer, so it can keep running between calls
         
+            Args:
+                since: Only packets captured at this time or later (as in time.time())
+                    are parsed, older are dropped. All stored packets are parsed if None
+
             Returns:
                 dict: Dictionary containing records of observed DNS responses.
                     First-level keys can be used as names of zone files, secnod-level
                     keys can be used as names of records in the zone file
         """
-        for packet in self.packets:
-            self.parse_dns_packet(packet)
+        # Take only the packets stored so far, sniffer may be appending new ones meanwhile
+        packet_count = len(self.packets)
+        packets = self.packets[:packet_count]
+        del self.packets[:packet_count]
+
+        self.dns_responses = {}
+        self.skipped_packets = 0
+        for packet in packets:
+            if since is not None and packet.time < since:
+                continue
+
+            # Malformed packet (e.g. undecodable name) should not discard the other responses
+            try:
+                self.parse_dns_packet(packet)
+            except MALFORMED_PACKET_ERRORS:
+                self.skipped_packets += 1
+
+        if self.skipped_packets:
+            print(f"Skipped {self.skipped_packets} malformed DNS packet(s)")
 
         return self.dns_responses
 
@@ -73,69 +176,30 @@ class DNSSniffer():
                     for *test.example.com*, returns *example.com*
                     - subdomains(str): Rest of the subdomains, for *test.a.com*, returns *test*
         """
+        return split_domain(query_name)
 
-        # Try to split the domain into subdomains (example.com = example, com)
-        domains = query_name.split('.')
-        main_zone_name = domains[-2] + '.' + domains[-1]
-
-        # Get the rest of the domains in the address
-        remain = domains[:-2]
-
-        # If there were subdomains left, they are the key. Else, zone_name is the key.
-        subdomains = main_zone_name
-        if remain:
-            subdomains = '.'.join(remain)
-
-        return main_zone_name, subdomains
-
-    def _assign_cnames(self, two_highest_level_domains: str, remaining_subdomain: str,\
-                        cname_records: list[str]) -> None:
+    def _assign_cnames(self, a_records: list[str], cname_records: list[str]) -> None:
         """Goes through the CNAME chain and creates new record for each CNAME
            For CNAME record for X being A,B,C, creates A and sets it as CNAME of B
            and sets B as CNAME of C. To C, it assigns the A results for the original query. 
 
            Args:
-            two_highest_level_domains: The two highest-level domains of the original query
-                (test.example.com -> example.com)
-            remaining_subdomain: Rest of the original queried domain (test.example.com -> test)
+            a_records: A records of the original query
             cname_records: List of all CNAME records
         """
 
-        # Go through CNAMEs and add a dedicated record for each CNAME
-        n_of_cnames = len(cname_records)
-        for i in range(n_of_cnames):
-            cname = cname_records[i]
-            tmp_assign_dict = {}
-            tmp_assign_dict_new = {}
+        # Prepare the records of the whole chain at once. If it's not the last CNAME, just add
+        # it another CNAME. If it's the last CNAME, give it an A resolution
+        chain_records = [{'A': [], 'CNAME': [following_cname]}\
+                         for following_cname in cname_records[1:]]
+        chain_records.append({'A': a_records, 'CNAME': []})
 
+        # Go through CNAMEs and add a dedicated record for each CNAME
+        for (cname, record) in zip(cname_records, chain_records):
             primary_zone_key, subdomains = self._obtain_subdomains(cname)
 
-            # If it's not the last CNAME, just add it another CNAME
-            if i+1 < n_of_cnames:
-                following_cname = cname_records[i+1]
-                tmp_assign_dict = {'A': [], 'CNAME': [following_cname]}
-
-            # If it's the last CNAME, give it an A resolution
-            else:
-                zone_records = self.dns_responses.get(two_highest_level_domains)
-                a_records = []
-
-                # If record for zone exists, obtain the a_records from already existing domain
-                # if it exists
-                if zone_records:
-                    domain_record = self.dns_responses[two_highest_level_domains].get(\
-                        remaining_subdomain)
-                    a_records = domain_record.get('A', [])
-
-                tmp_assign_dict = {'A': a_records, 'CNAME': []}
-
-            tmp_assign_dict_new = {subdomains: tmp_assign_dict}
-
-            # Check if it already exists and if not, create it. Else use existing A response.
-            if not self.dns_responses.get(primary_zone_key):
-                self.dns_responses[primary_zone_key] = tmp_assign_dict_new
-            else:
-                self.dns_responses[primary_zone_key][subdomains] = tmp_assign_dict
+            # Create the zone if it does not exist yet and add the record into it
+            self.dns_responses.setdefault(primary_zone_key, {})[subdomains] = record
 
     def _process_dns_answers(self, dns_layer: Packet) -> tuple[list[str], list[str]]:
         """Internal method to process answers in DNS layer
@@ -152,18 +216,16 @@ class DNSSniffer():
         a_records = []
         cname_records = []
 
-        for i in range(dns_layer.ancount):
-            answer = dns_layer.an[i]
+        for answer in dns_layer.an[:dns_layer.ancount]:
 
             # Check it's `A` record and if so add to the responses
-            # type defitnition at: https://datatracker.ietf.org/doc/html/rfc1035#page-12
-            if answer.type == 1:
+            if answer.type == DNS_TYPE_A:
                 a_records.append(answer.rdata)
 
             # If it's a `CNAME` record, store the alias
-            elif answer.type == 5:
+            elif answer.type == DNS_TYPE_CNAME:
                 # Decode from binary and remove the dot on the right
-                cname_records.append(answer.rdata.decode().rstrip('.'))
+                cname_records.append(decode_domain_name(answer.rdata))
 
         return a_records, cname_records
 
@@ -180,43 +242,25 @@ class DNSSniffer():
             cname_records: List of received CNAME responses
         """
 
-         # If there was an A record, save it
-        if a_records:
-            # Already requested before
-            if self.dns_responses.get(two_highest_level_domains):
-                if self.dns_responses[two_highest_level_domains].get(subdomain):
+        # Nothing to save (e.g. only AAAA answers)
+        if not a_records and not cname_records:
+            return
 
-                    # Overwrite the result (should be the same because of cache anyway)
-                    self.dns_responses[two_highest_level_domains][subdomain]['A'] = a_records
+        # Obtain the existing record (already requested before) or create a new one
+        zone_records = self.dns_responses.setdefault(two_highest_level_domains, {})
+        record = zone_records.setdefault(subdomain, {'A': [], 'CNAME': []})
 
-                # New zone_key
-                else:
-                    self.dns_responses[two_highest_level_domains][subdomain] = \
-                        {'A': a_records, 'CNAME': []}
-            else:
-                tmp_assign_dict = {subdomain:{'A': a_records, 'CNAME': []}}
-                self.dns_responses[two_highest_level_domains] = tmp_assign_dict
+        # If there was an A record, save it
+        # Overwrite the result (should be the same because of cache anyway)
+        if a_records:
+            record['A'] = a_records
 
         # If I logged a CNAME, save each CNAME as its own resolution
         if cname_records:
-            # Already requested before
-            if self.dns_responses.get(two_highest_level_domains):
-                if self.dns_responses[two_highest_level_domains].get(subdomain):
-
-                    # Overwrite source
-                    self.dns_responses[two_highest_level_domains][subdomain]['CNAME'] = \
-                        cname_records
-
-                # New zone_key
-                else:
-                    self.dns_responses[two_highest_level_domains][subdomain] = \
-                        {'A': [], 'CNAME': cname_records}
-            else:
-                tmp_assign_dict = {subdomain: {'A': [], 'CNAME': cname_records}}
-                self.dns_responses[two_highest_level_domains] = tmp_assign_dict
+            record['CNAME'] = cname_records
 
             # For each observed cname, assign it its own record
-            self._assign_cnames(two_highest_level_domains, subdomain, cname_records)
+            self._assign_cnames(record['A'], cname_records)
 
     # https://scapy.readthedocs.io/en/latest/api/scapy.layers.dns.html#scapy.layers.dns.DNS
     def parse_dns_packet(self, packet: Packet) -> None:
@@ -225,12 +269,12 @@ class DNSSniffer():
         Args:
             packet: The DNS packet to process
         """
-        # Check it's DNS response
-        if packet.haslayer(DNS) and DNSRR in packet:
-            dns_layer = packet.getlayer(DNS)
+        # Check it's DNS response with some answers
+        dns_layer = packet.getlayer(DNS)
+        if dns_layer is not None and dns_layer.ancount:
 
             # Requested page
-            query_name = dns_layer.qd.qname.decode().rstrip('.')
+            query_name = decode_domain_name(dns_layer.qd.qname)
             primary_zone_name, subdomain = self._obtain_subdomains(query_name)
 
             # Collected responses
@@ -17,7 +17,6 @@
 #
 
 # Built-in modules
-import json
 import os
 import time
 
@@ -29,9 +28,13 @@ from selenium.webdriver.common.by import By
 
 # Custom modules
 from source.constants import TRAFFIC_FOLDER
+from source.file_manipulation import parse_json
 from source.setup_driver import setup_chrome_for_traffic_logging
 from config import Config
 
+# Internal devtools requests, chrome internal pages and JShelter loaded data
+INTERNAL_URL_PREFIXES = ("devtools://", "chrome://", "https://[ff00::]/chrome-extension://")
+
 def enable_developer_mode(driver: webdriver.Chrome) -> None:
     """Function to enable developer mode inside Selenium-driven Chrome
 
@@ -79,28 +82,14 @@ def is_internal_network_event(log: dict) -> bool:
     Returns:
         status (bool): Whether the provided event corresponds to an internal request
     """
-    status = False
-
-    # Skip internal devtools requests
-    if "devtools://" in log["params"]["request"]["url"] or\
-        "devtools://" in log["params"]["documentURL"]:
-        status = True
-
-    # Skip chrome internal pages
-    if "chrome://" in log["params"]["request"]["url"] or\
-        "chrome://" in log["params"]["documentURL"]:
-        status = True
+    request_url = log["params"]["request"]["url"]
+    document_url = log["params"]["documentURL"]
 
-    # Skip JShelter loaded data
-    if "https://[ff00::]/chrome-extension://" in log["params"]["request"]["url"] or\
-        "https://[ff00::]/chrome-extension://" in log["params"]["documentURL"]:
-        status = True
-
-    return status
+    return request_url.startswith(INTERNAL_URL_PREFIXES) or\
+        document_url.startswith(INTERNAL_URL_PREFIXES)
 
 def last_valid_parent(stack: dict) -> dict:
-    """Function to be recursively called to find first non-empty parent url in
-    callstack to decrease log size
+    """Function to find first non-empty parent url in callstack to decrease log size
 
     Args:
         stack: Dictionary containing the initiator.stack
@@ -109,20 +98,19 @@ def last_valid_parent(stack: dict) -> dict:
         dict: New stack containing only one final caller or empty stack if none available
             
     """
-    call_frames = stack.get("callFrames", [])
-    for call in call_frames:
-
-        # Skip empty strings JShelter overrides
-        if call["url"] != "" and not call["url"].startswith("chrome"):
+    # Go deeper through the parents until a valid caller is found
+    while stack:
+        call_frames = stack.get("callFrames", [])
+        for call in call_frames:
 
-            # Keep the original structure
-            return {"stack": {"callFrames": [call]}}
+            # Skip empty strings JShelter overrides
+            if call["url"] != "" and not call["url"].startswith("chrome"):
 
-    # Check parent stack exists before delving deeper
-    if stack.get("parent"):
+                # Keep the original structure
+                return {"stack": {"callFrames": [call]}}
 
-        # No valid find (or callFrame empty), go deeper
-        return last_valid_parent(stack["parent"])
+        # No valid find (or callFrame empty), continue with the parent if it exists
+        stack = stack.get("parent")
 
     # No parent, didn't find anything, return blank parent
     empty_stack = {"stack": {"callFrames": []}}
@@ -143,7 +131,7 @@ def reduce_initiator_callstack(log: dict) -> dict:
     # Only compactize if stack is present
     if tmp_initiator.get("stack"):
 
-        # Recursively go until you find the first non-empty non-JShelter
+        # Go through the parents until you find the first non-empty non-JShelter
         # parent and save only them
         reduced_log = last_valid_parent(tmp_initiator["stack"])
         reduced_log["type"] = tmp_initiator["type"]
@@ -202,7 +190,7 @@ def get_network_requests(logs: dict, compact: bool) -> list[dict]:
     parsed_logs = []
     # Go through all the recorded logs
     for log in logs:
-        log = json.loads(log["message"])["message"]
+        log = parse_json(log["message"])["message"]
 
         # Filter in only the logs with required data
         if log["method"] == "Network.requestWillBeSent":
@@ -18,15 +18,14 @@
 #
 
 # Built-in modules
-import json
 import os
-import re
+import time
 
 # Custom modules
-from source.file_manipulation import load_pages
+from source.file_manipulation import load_pages, dump_json
 from source.traffic_logger.network_logs_loader import get_page_network_traffic
 from source.constants import TRAFFIC_FOLDER, FILE_ERROR, GENERAL_ERROR
-from source.traffic_logger.dns_observer import DNSSniffer
+from source.traffic_logger.dns_observer import DNSSniffer, split_domain
 from config import Config
 
 def get_address(resource: str) -> str:
@@ -39,10 +38,11 @@ def get_address(resource: str) -> str:
     Returns:
         domain (str): URL of the domain, if available
     """
-    domain = ""
-    matched = re.search(r"\/\/(.*?)\/", resource)
-    if matched:
-        domain = matched.group(1)
+    # Domain is between the first '//' and the following '/'
+    _, _, rest = resource.partition("//")
+    domain, separator, _ = rest.partition("/")
+    if not separator:
+        return ""
 
     return domain
 
@@ -62,11 +62,13 @@ def is_dns_valid(dns_traffic: dict, network_traffic: list) -> tuple[bool, dict]:
     """
 
     status = False
-    observed_dns_logs = {}
 
     # Mark all DNS logs as unnecessary in the beginning
-    for (key, _) in dns_traffic.items():
-        observed_dns_logs[key] = False
+    observed_dns_logs = dict.fromkeys(dns_traffic, False)
+
+    # Pages request many resources from the same domains, check each domain only once
+    checked_addresses = set()
+    checked_zones = set()
 
     # Go through all network traffic and check the domain is in the DNS logs
     for resource in network_traffic:
@@ -77,6 +79,8 @@ def is_dns_valid(dns_traffic: dict, network_traffic: list) -> tuple[bool, dict]:
             continue
 
         address = get_address(requested_resource)
+        if address in checked_addresses:
+            continue
 
         # If empty address was returned, nothing was matched meaning an error
         if address == "":
@@ -84,45 +88,44 @@ def is_dns_valid(dns_traffic: dict, network_traffic: list) -> tuple[bool, dict]:
             print("CDP format could have changed! Or just some strange address...")
             return status, {}
 
-        split = address.split('.')
-        last_two = split[-2:]
-        rest = split[:-2]
-
-        # In case the page was like google.com, meaning no subdomains, use it all to check
-        if not rest:
-            rest = last_two
-
-        top_level_key = '.'.join(last_two)
+        # Split the same way as the sniffer when storing the responses
+        # In case the page was like google.com, meaning no subdomains, it is used whole to check
+        top_level_key, subdomain_key = split_domain(address)
         top_level = dns_traffic.get(top_level_key, None)
 
         if not top_level:
             return status, {}
 
-        subdomain = top_level.get('.'.join(rest), None)
+        subdomain = top_level.get(subdomain_key, None)
         if not subdomain:
             return status, {}
 
+        checked_addresses.add(address)
+
         # Set the page as necessary
         observed_dns_logs[top_level_key] = True
 
+        # CNAMEs of this zone were already set by its other subdomain
+        if top_level_key in checked_zones:
+            continue
+        checked_zones.add(top_level_key)
+
         # Set all logged CNAMEs for this domain as neccessary
-        for (_, records) in dns_traffic[top_level_key].items():
+        for records in top_level.values():
             cname_records = records.get("CNAME", [])
             for record in cname_records:
-                split = record.split('.')
-                last_two = split[-2:]
-                cname_key = '.'.join(last_two)
+                cname_key, _ = split_domain(record)
                 observed_dns_logs[cname_key] = True
 
     # Go through all DNS and delete all records that do not belong to logged network request.
-    for (key, subdomains) in observed_dns_logs.items():
+    # Check each kept DNS reply contains valid answer in the same pass
+    for (key, subdomains) in list(dns_traffic.items()):
         if not observed_dns_logs[key]:
             del dns_traffic[key]
+            continue
 
-    # Check each logged DNS reply contains valid answer
-    for (_, subdomains) in dns_traffic.items():
         # For each valid key, check all subkeys are either CNAMEs or A, both cant be empty
-        for (_, records) in subdomains.items():
+        for records in subdomains.values():
             cname_records = records.get("CNAME", [])
             a_records = records.get("A", [])
 
@@ -159,7 +162,8 @@ def visit_page(page: str, options: Config, compact: bool) -> tuple[bool, list]:
 
     return status, network_traffic
 
-def save_traffic(traffic: dict, pagename: str, filename: str, traffic_type: str) -> None:
+def save_traffic(traffic: dict, pagename: str, filename: str, traffic_type: str,\
+                 compact: bool = False) -> None:
     """Function to save observed traffic as a file
     
     Args:
@@ -167,18 +171,18 @@ def save_traffic(traffic: dict, pagename: str, filename: str, traffic_type: str)
         pagename: Name of the page from which the traffic was collected
         filename: Number of the accessed page as a str (1,2...)
         traffic_type: Type of saved traffic ('dns' or 'network')
+        compact: Whether to save the traffic without indentation to save space
     """
     try:
-        f = None
         if traffic_type == "dns":
-            f = open(TRAFFIC_FOLDER + filename + '_dns' + '.json', 'w', encoding='utf-8')
+            path = f"{TRAFFIC_FOLDER}{filename}_dns.json"
         else: # http
-            f = open(TRAFFIC_FOLDER + filename + '_network.json', 'w', encoding='utf-8')
+            path = f"{TRAFFIC_FOLDER}{filename}_network.json"
 
-        # Format the dictionary as json
-        jsoned_traffic = json.dumps(traffic, indent=4)
-        f.write(jsoned_traffic)
-        f.close()
+        # Format the dictionary as json, indented traffic keeps non-ASCII characters escaped
+        jsoned_traffic = dump_json(traffic, indent=not compact, ensure_ascii=not compact)
+        with open(path, 'wb') as f:
+            f.write(jsoned_traffic)
 
     except Exception as e:
         print("Could not save traffic to a file! Problem with page:", pagename)
@@ -190,11 +194,9 @@ def delete_unsuccesfull_fpd() -> None:
     """Function to delete FPD files for pages that failed to correctly load"""
 
     # Load the only different files (Downloaded FPD file name not matching the log format)
-    files = [f for f in os.listdir(TRAFFIC_FOLDER) if not re.match(r'^[0-9]', f)]
-
     # if it wasnt .empty, load them and delete them
-    for file in files:
-        if file != ".empty":
+    for file in os.listdir(TRAFFIC_FOLDER):
+        if not file[:1].isdigit() and file != ".empty":
             os.remove(TRAFFIC_FOLDER + file)
 
 def match_jshelter_fpd(current_log_number: int) -> None:
@@ -209,17 +211,11 @@ def match_jshelter_fpd(current_log_number: int) -> None:
     # with different name compared to the others.
 
     # Load the only different file and rename it to match the others
-    files = [f for f in os.listdir(TRAFFIC_FOLDER) if not re.match(r'^[0-9]', f)]
-
     # There should be 2 non-matching files -> .empty and fpd file, find the fpd file
     # However, sometimes, the download may trigger twice -> delete other non-matching
-    found_files = []
-    for file in files:
-        _, extension = os.path.splitext(file)
-        if file != ".empty":
-            # Only add JSON files
-            if extension == ".json":
-                found_files.append(file)
+    # Only JSON files are added, which also skips .empty
+    found_files = [f for f in os.listdir(TRAFFIC_FOLDER)
+                   if not f[:1].isdigit() and os.path.splitext(f)[1] == ".json"]
 
     if not found_files:
         print("Can't match FP file to its corresponding traffic files!")
@@ -227,7 +223,7 @@ def match_jshelter_fpd(current_log_number: int) -> None:
         exit(GENERAL_ERROR)
 
     original_filepath = TRAFFIC_FOLDER + found_files[0]
-    new_filename = TRAFFIC_FOLDER + str(current_log_number) + "_fp.json"
+    new_filename = f"{TRAFFIC_FOLDER}{current_log_number}_fp.json"
     os.rename(original_filepath, new_filename)
 
     delete_unsuccesfull_fpd()
@@ -238,7 +234,7 @@ def get_page_logs(sniffer: DNSSniffer, page: str, options: Config, compact: bool
     """Function to obtain network and dns logs from a carried out page visit
     
         Args:
-            sniffer: Instance of a DNSSniffer
+            sniffer: Instance of a running DNSSniffer
             page: URL of the page from which to obtain logs
             options: Instance of Config
             compact: Whether to save only the final valid caller in call stacks to save space
@@ -248,18 +244,20 @@ def get_page_logs(sniffer: DNSSniffer, page: str, options: Config, compact: bool
                 - dict: DNS traffic logged from the visited page
                 - list: Network traffic obtained from the visited page
     """
-    sniffer.start_sniffer()
+    # The sniffer is running during the whole logging, only responses captured
+    # from the start of this visit belong to the page
+    visit_start = time.time()
 
     # Get the HTTP(S) traffic associated with a page
     visit_status, network_traffic = visit_page(page, options, compact)
 
     # If error, return nothing
     if not visit_status:
-        sniffer.stop_sniffer()
         return {}, []
 
-    sniffer.stop_sniffer()
-    dns_traffic = sniffer.get_traffic()
+    # Let the capture thread store the responses of this visit before parsing them
+    sniffer.wait_for_packets()
+    dns_traffic = sniffer.get_traffic(since=visit_start)
 
     return dns_traffic, network_traffic
 
@@ -280,57 +278,61 @@ def load_traffic(options: Config, compact: bool) -> None:
     max_file_counter = len(pages)
     max_attempts = options.max_repeat_log_attempts
 
-    # Go through each page and observe traffic
-    for page in pages:
+    # Sniff DNS for the whole logging, each page takes only responses captured during its visit
+    sniffer = DNSSniffer()
+    sniffer.start_sniffer()
 
-        attempts = 0
+    # Stop the sniffer even if the logging is interrupted
+    try:
+        # Go through each page and observe traffic
+        for page in pages:
 
-        # A new instance needs to be created for each page since the sniffer saves logged packets
-        # reusing it would keep the previous packets
-        sniffer = DNSSniffer()
+            attempts = 0
 
-        print(f"Page visit progress: {filename_counter}/{max_file_counter}")
-        dns_traffic, network_traffic = get_page_logs(sniffer, page, options, compact)
+            print(f"Page visit progress: {filename_counter}/{max_file_counter}")
+            dns_traffic, network_traffic = get_page_logs(sniffer, page, options, compact)
 
-        # If no DNS validation, it is always valid
-        if options.no_dns_validation_during_logging:
-            dns_validity = True
-        else:
-            dns_validity, dns_traffic = is_dns_valid(dns_traffic, network_traffic)
+            # If no DNS validation, it is always valid
+            if options.no_dns_validation_during_logging:
+                dns_validity = True
+            else:
+                dns_validity, dns_traffic = is_dns_valid(dns_traffic, network_traffic)
 
-        if not network_traffic:
-            print(f"Error loading {page}! Skipping...")
-            delete_unsuccesfull_fpd()
-            filename_counter += 1
-            continue
+            if not network_traffic:
+                print(f"Error loading {page}! Skipping...")
+                delete_unsuccesfull_fpd()
+                filename_counter += 1
+                continue
+
+            # Check all traffic has its DNS logged
+            # If DNS error, try again as many times as user wants
+            while attempts < max_attempts:
+                attempts += 1
+                if not dns_validity:
+                    print(f"Could not correctly sniff DNS traffic for {page}! Trying again...")
+                    delete_unsuccesfull_fpd()
+                    dns_traffic, network_traffic = get_page_logs(sniffer, page, options, compact)
+                    dns_validity, dns_traffic = is_dns_valid(dns_traffic, network_traffic)
+                else:
+                    break
+
+                # If network error happened that did not happen before, try again
+                if not network_traffic:
+                    print(f"Error loading {page}! Trying again...")
+                    dns_validity = False
 
-        # Check all traffic has its DNS logged
-        # If DNS error, try again as many times as user wants
-        while attempts < max_attempts:
-            attempts += 1
             if not dns_validity:
-                print(f"Could not correctly sniff DNS traffic for {page}! Trying again...")
+                print(f"Could not correctly sniff DNS traffic for {page}! Skipping...")
+                filename_counter += 1
                 delete_unsuccesfull_fpd()
-                dns_traffic, network_traffic = get_page_logs(sniffer, page, options, compact)
-                dns_validity, dns_traffic = is_dns_valid(dns_traffic, network_traffic)
-            else:
-                break
-
-            # If network error happened that did not happen before, try again
-            if not network_traffic:
-                print(f"Error loading {page}! Trying again...")
-                dns_validity = False
+                continue
 
-        if not dns_validity:
-            print(f"Could not correctly sniff DNS traffic for {page}! Skipping...")
+            # Save the results and match downloaded JShelter report to the current result
+            save_traffic(dns_traffic, page, str(filename_counter), "dns", compact)
+            save_traffic(network_traffic, page, str(filename_counter), "http", compact)
+            match_jshelter_fpd(filename_counter)
             filename_counter += 1
-            delete_unsuccesfull_fpd()
-            continue
-
-        # Save the results and match downloaded JShelter report to the current result
-        save_traffic(dns_traffic, page, str(filename_counter), "dns")
-        save_traffic(network_traffic, page, str(filename_counter), "http")
-        match_jshelter_fpd(filename_counter)
-        filename_counter += 1
+    finally:
+        sniffer.stop_sniffer()
 
     print("Traffic loading finished!")
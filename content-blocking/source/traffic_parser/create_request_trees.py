@@ -23,12 +23,16 @@ import sys
 # Custom modules
 from config import Config
 from source.file_manipulation import load_json, get_traffic_files
+from source.parallel import parallel_map
 from source.utils import print_progress, add_substract_fp_attempts
 from source.traffic_parser.request_node import RequestNode
 from source.traffic_parser.request_tree import RequestTree
 
 ANONYMOUS_CALLERS = "<anonymous>"
 
+# Whether trees are reconstructed as lower-bound trees, set by init_tree_worker
+worker_lower_bound_trees = False
+
 
 def fix_missing_parent(current_root_node: RequestNode, resource_node: RequestNode) -> None:
     """handle initiator when child resource was loaded before the parent, should rarely happen
@@ -44,28 +48,28 @@ def fix_missing_parent(current_root_node: RequestNode, resource_node: RequestNod
     current_root_node.add_child(resource_node)
 
 def join_call_frames(stack: dict) -> list[str]:
-    """Function to recursively obtain the callstack containing all parents
+    """Function to obtain the callstack containing all parents
     
     Args:
         stack: initator call stack attribute
     Returns:
         list: URLs of callers in the call stack, the final caller is the last
     """
-    frames = []
+    # Collect callframes of the stack and all its parents
+    # Go from the top -> Deepest parent last
+    callframes = []
+    while stack:
+        callframes.append(stack.get("callFrames", []))
+        stack = stack.get("parent")
 
-    # Recursively obtain all parents if they exist
-    # Go from the bottom -> Deepest parent first
-    parent = stack.get("parent")
-    if parent:
-        deeper_parents = join_call_frames(parent)
-        frames.extend(deeper_parents)
+    frames = []
 
-    # Add results from the current callframe
-    # Reverse the list because the first in the stack is the final which caused it
+    # Add results from the deepest parent first
+    # Reverse each callframe because the first in the stack is the final which caused it
     # -> should be last
-    current_callframe = stack.get("callFrames", [])[::-1]
-    for call in current_callframe:
-        frames.append(call["url"])
+    for current_callframe in reversed(callframes):
+        for call in reversed(current_callframe):
+            frames.append(call["url"])
 
     return frames
 
@@ -295,10 +299,10 @@ def reconstruct_tree(observed_traffic: dict, fp_attempts: dict, lower_bound_tree
                                                         lower_bound_trees)
 
         else:
-            existing_nodes = tree.find_nodes(current_resource)
-
             # Solve LOWER-BOUND issue of A -> B,C -> A,C by limiting at msot one of all.
+            # Only look for existing nodes there, they are not needed otherwise
             if lower_bound_trees:
+                existing_nodes = tree.find_nodes(current_resource)
                 if existing_nodes:
                     node = existing_nodes[0]
 
@@ -326,29 +330,33 @@ def reconstruct_tree(observed_traffic: dict, fp_attempts: dict, lower_bound_tree
                 else:
                     current_root_node.add_child(node)
 
+    # The tree is complete, no more nodes are added to it
+    if tree:
+        tree.freeze()
+
     return tree
 
-def load_network_traffic_files() -> list[dict]:
-    """Function to return observed network traffic  for each page as a record in dict
+def init_tree_worker(lower_bound_trees: bool) -> None:
+    """Function to set the type of trees reconstructed by build_tree in this process
     
-    Returns:
-        list[dict]: List of loaded network logs
+    Args:
+        lower_bound_trees: Whether to create lower_bound_trees (no duplicate nodes)
     """
-    # Load all HTTP(S) traffic files from `./traffic/` folder
-    network_files = get_traffic_files("network")
-
-    traffic_logs = []
-    for file in network_files:
-        traffic = load_json(file)
+    global worker_lower_bound_trees
+    worker_lower_bound_trees = lower_bound_trees
 
-        # obtain pure filename to be used as key for both FP files and resource tree
-        pure_filename = os.path.basename(file)
-
-        # Add name of the file as part of tuple
-        traffic_logs.append((traffic, pure_filename))
-
-    return traffic_logs
+def build_tree(task: tuple[str, dict]) -> RequestTree:
+    """Function to load a network traffic file and reconstruct its request tree.
+    Expects init_tree_worker was called in this process before.
+    
+    Args:
+        task: Path to the network traffic file and FP attempts observed on the page
 
+    Returns:
+        RequestTree: Request tree of the page with associated FP attempts
+    """
+    (network_file, fp_attempts) = task
+    return reconstruct_tree(load_json(network_file), fp_attempts, worker_lower_bound_trees)
 
 def create_trees(fp_attempts: dict, options: Config) -> dict[RequestTree]:
     """Function to load all HTTP traffic files and reconstruct request trees
@@ -364,19 +372,20 @@ def create_trees(fp_attempts: dict, options: Config) -> dict[RequestTree]:
     print("Reconstructing request trees...")
 
     trees = {}
-    traffic_logs = load_network_traffic_files()
-    total = len(traffic_logs)
+    network_files = get_traffic_files("network")
+    total = len(network_files)
     progress_printer = print_progress(total, "Creating request trees...")
-    lower_bound_trees = options.lower_bound_trees
 
-    for (traffic, traffic_file_number) in traffic_logs:
-        progress_printer()
+    # obtain corresponding FP attempts, in case of an error (should never happen)
+    # use an empty dict with no FP attempts observed
+    # pure filename is used as key for both FP files and resource tree
+    tasks = [(file, fp_attempts.get(os.path.basename(file), {})) for file in network_files]
 
-        # obtain corresponding FP attempts, in case of an error (should never happen)
-        # return an empty dict with no FP attempts observed
-        corresponding_fp_attempts = fp_attempts.get(traffic_file_number, {})
-        trees[traffic_file_number] = reconstruct_tree(traffic, corresponding_fp_attempts,\
-                                            lower_bound_trees)
+    # Pages are independent, so load and reconstruct them in parallel
+    for (file, tree) in zip(network_files, parallel_map(build_tree, tasks,\
+                            initializer=init_tree_worker, initargs=(options.lower_bound_trees,))):
+        progress_printer()
+        trees[os.path.basename(file)] = tree
 
     print("Request trees reconstructed!")
     return trees
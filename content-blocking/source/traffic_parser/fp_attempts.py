@@ -18,15 +18,21 @@
 
 # Built-in modules
 import os
+from functools import lru_cache
 
 # Custom modules
 from source.constants import GENERAL_ERROR, FPD_WRAPPERS_FILE, FPD_GROUPS_FILE
 from source.file_manipulation import load_json, get_traffic_files
+from source.parallel import parallel_map
 from source.utils import print_progress
 
 ANONYMOUS_CALLER = "<anonymous>"
 TOP_LEVEL_FP_GROUP = "TOP_LEVEL"
 
+# FP groups and wrapped APIs used when loading FP files, set by init_fp_worker
+worker_fp_groups = {}
+worker_fp_wrappers = {}
+
 def get_primary_groups(all_groups: dict) -> list:
     """Function to return all top-level primary groups from a dict of all groups
     
@@ -51,84 +57,84 @@ def construct_default_fp_value(primary_groups: list) -> dict:
     Returns:
         dict: Each of the primary groups has assigned 0 observed attempts by default
     """
-    default = {}
-    for group in primary_groups:
-        default[group] = 0
-    return default
+    return dict.fromkeys(primary_groups, 0)
+
+# The same last line repeats in many callstacks (same script calling from the same place)
+@lru_cache(maxsize=65536)
+def parse_last_caller(last_caller: str) -> str:
+    """Function to parse last caller string to obtain only the URL. Results are cached
 
-def parse_callers(all_callers: dict, fp_logs: dict, primary_group: list,\
-                    all_primary_groups: list) -> dict:
-    """Function to parse callstack of a property
-    
     Args:
-        all_callers: All resources responsible for calling the API
-        fp_logs: All resources with assigned number of FP attempts
-        primary_group: list of assigned primary groups for the processed API
-        all_primary_groups: All top-level primary groups from the FPD config
+        last_caller: Line from error call stack containing the final caller
 
     Returns:
-        dict: Updated observed FP attempts caused by calling the parsed property
+        str: URL of the caller extracted from the text-like callstack
     """
-    def parse_last_caller(last_caller: str) -> str:
-        """Inline method to parse last caller string to obtain only the URL
-        
-        Args:
-            last_caller: Line from error call stack containing the final caller
-        
-        Returns:
-            str: URL of the caller extracted from the text-like callstack
-        """
 
-        # Split it by space and get the last
-        split_by_space = last_caller.split(" ")
-        final_last_caller = split_by_space[-1]
+    # Split it by space and get the last
+    split_by_space = last_caller.split(" ")
+    final_last_caller = split_by_space[-1]
+
+    # If it was an anonymous caller, check if there's an associated URL where
+    # the anonymous funciton comes from.
+    if final_last_caller.startswith(ANONYMOUS_CALLER):
+        split_by_comma = last_caller.rsplit(",", 1)
+
+        # If I could split it, the URL is the second to last part
+        if len(split_by_comma) >= 2:
+            second_to_last_part = split_by_comma[-2]
 
-        # If it was an anonymous caller, check if there's an associated URL where
-        # the anonymous funciton comes from.
-        if final_last_caller.startswith(ANONYMOUS_CALLER):
-            split_by_comma = last_caller.rsplit(",", 1)
+            # Now go through the part with the url
+            return parse_last_caller(second_to_last_part)
 
-            # If I could split it, the URL is the second to last part
-            if len(split_by_comma) >= 2:
-                second_to_last_part = split_by_comma[-2]
+    # Remove brackets in case they're there
+    if (final_last_caller[0]) == '(':
+        final_last_caller = final_last_caller[1:-1]
 
-                # Now go through the part with the url
-                return parse_last_caller(second_to_last_part)
+    # Split twice from the right, because last caller has formatting :1:1 (line number)
+    final_last_caller = final_last_caller.rsplit(':', 2)
 
-        # Remove brackets in case they're there
-        if (final_last_caller[0]) == '(':
-            final_last_caller = final_last_caller[1:-1]
+    final_last_caller = final_last_caller[0]
 
-        # Split twice from the right, because last caller has formatting :1:1 (line number)
-        final_last_caller = final_last_caller.rsplit(':', 2)
+    return final_last_caller
 
-        final_last_caller = final_last_caller[0]
+def parse_callers(all_callers: dict, fp_logs: dict, primary_group: list,\
+                    all_primary_groups: list) -> dict:
+    """Function to parse callstack of a property
+    
+    Args:
+        all_callers: All resources responsible for calling the API
+        fp_logs: All resources with assigned number of FP attempts
+        primary_group: list of assigned primary groups for the processed API
+        all_primary_groups: All top-level primary groups from the FPD config
 
-        return final_last_caller
+    Returns:
+        dict: Updated observed FP attempts caused by calling the parsed property.
+            fp_logs is updated in place and returned
+    """
+    # Most APIs belong to a single primary group, increment it directly without the inner loop
+    single_group = primary_group[0] if len(primary_group) == 1 else None
 
     # Callstacks are still in the form of a key in dict, obtain it
     # Get all callers of a given property
-    for (callers, _) in all_callers.items():
-
-        # Split the callstack by a newline
-        callstack = callers.split("\n")
+    for callers in all_callers:
 
-        # Get the last caller
-        last_caller = parse_last_caller(callstack[-1])
+        # Only the last line of the callstack is needed, get the last caller from it
+        last_caller = parse_last_caller(callers.rpartition("\n")[2])
 
         # Each callstack means one more attempt, add it to the page attempts count
         current_page_fp = fp_logs.get(last_caller)
 
         # Page was not logged yet
-        if not current_page_fp:
-            fp_logs[last_caller] = construct_default_fp_value(all_primary_groups)
-            for group in primary_group:
-                fp_logs[last_caller][group] += 1
+        if current_page_fp is None:
+            current_page_fp = construct_default_fp_value(all_primary_groups)
+            fp_logs[last_caller] = current_page_fp
 
-        # Page has already been observedd to attempt some FP
+        if single_group is not None:
+            current_page_fp[single_group] += 1
         else:
             for group in primary_group:
-                fp_logs[last_caller][group] += 1
+                current_page_fp[group] += 1
 
     return fp_logs
 
@@ -143,11 +149,15 @@ def parse_property_logs(primary_group: list, property_logs: dict, fp_logs: dict,
         all_primary_groups: All primary groups obtained from the FP config
 
     Returns:
-        dict: Associated FP attempts to each logged resource
+        dict: Associated FP attempts to each logged resource. fp_logs is updated in place
+            and returned
     """
+    # API without any assigned group (not in the wrappers file) can not be counted
+    if primary_group is None:
+        return fp_logs
+
     # Go throug call/get/set
-    for (obtain_key, _) in property_logs.items():
-        property_log_data = property_logs[obtain_key]
+    for property_log_data in property_logs.values():
 
         # Obtain callers of the property -> if unavailable, return empty
         callers = property_log_data.get("callers", {})
@@ -157,19 +167,20 @@ def parse_property_logs(primary_group: list, property_logs: dict, fp_logs: dict,
             total = int(property_log_data.get("total", 0))
 
             # Check if anonymous caller is present already or not
-            if fp_logs.get(ANONYMOUS_CALLER):
-                for group in primary_group:
-                    fp_logs[ANONYMOUS_CALLER][group] += total
+            anonymous_fp = fp_logs.get(ANONYMOUS_CALLER)
 
             # If not inserted yet, create default value for all categories
-            else:
-                fp_logs[ANONYMOUS_CALLER] = construct_default_fp_value(all_primary_groups)
-                for group in primary_group:
-                    fp_logs[ANONYMOUS_CALLER][group] += total
+            if anonymous_fp is None:
+                anonymous_fp = construct_default_fp_value(all_primary_groups)
+                fp_logs[ANONYMOUS_CALLER] = anonymous_fp
+
+            for group in primary_group:
+                anonymous_fp[group] += total
 
         # The caller will be only the last page which actually called the API
         # Similar to the request tree, where predecessor is the last page in callstack
-        fp_logs = parse_callers(callers, fp_logs, primary_group, all_primary_groups)
+        # fp_logs is updated in place
+        parse_callers(callers, fp_logs, primary_group, all_primary_groups)
 
     return fp_logs
 
@@ -192,18 +203,16 @@ def get_fp_attempts(fp_data: dict, all_groups: dict, property_groups: dict) -> d
 
     # Go through the log file and obtain access logs
     try:
-        for (log_key, _) in fp_data.items():
-            access_logs = fp_data[log_key]
+        for access_logs in fp_data.values():
 
             # Go through each logged site in the report
-            for (site_key, _) in access_logs.items():
-                site_data = access_logs[site_key]
+            for site_data in access_logs.values():
 
                 # Go through each FP property
                 for (property_name, fp_property_logs) in site_data.items():
                     primary_group = property_groups.get(property_name)
-                    fp_logs = parse_property_logs(primary_group, fp_property_logs, fp_logs,
-                                                    primary_groups)
+                    parse_property_logs(primary_group, fp_property_logs, fp_logs,
+                                        primary_groups)
 
     except Exception as e:
         print(e)
@@ -254,29 +263,13 @@ def assign_property_group(fp_groups: dict) -> dict:
     Returns:
         dict: Dict with key being all wrapped APIs and value being their primary parent group
     """
-    def get_primary_group(group_name: str, fp_groups: dict) -> str:
-        """Internal method to find primary parent for a given group
-        
-        Args:
-            group_name: Name of the group we are searching primary parent for
-            fp_groups: All loaded groups with assigned parents
-
-        Returns:
-            str: name of the primary parent group
-        """
-        primary_name = fp_groups.get(group_name, None)
-
+    # Find primary parent of each group only once, many properties share the same groups
+    # Top-level parent is the primary group of itself
+    primary_groups = {}
+    for (group_name, primary_name) in fp_groups.items():
         if primary_name:
-            # Check if it isnt top-level parent, if so, return the parent themselves
-            if primary_name == TOP_LEVEL_FP_GROUP:
-                return group_name
-
-            # If it isnt, return the primary parent
-            return primary_name
-
-        # If primary name is unknown (should not happen), it ssignalizes wrong file format
-        print("Error parsing FP files! Are files in ./source/traffic_parser/fp_files/ valid?")
-        exit(GENERAL_ERROR)
+            primary_groups[group_name] = group_name if primary_name == TOP_LEVEL_FP_GROUP\
+                                            else primary_name
 
     wrapped_properties = load_json(FPD_WRAPPERS_FILE)
 
@@ -291,16 +284,19 @@ def assign_property_group(fp_groups: dict) -> dict:
         if assigned_groups:
             for group in assigned_groups:
                 group_name = group.get("group")
-                primary_group = get_primary_group(group_name, fp_groups)
+                primary_group = primary_groups.get(group_name)
 
-                # Check if property already has group assigned
-                if properties_groups.get(property_name):
+                # If primary name is unknown (should not happen), it ssignalizes wrong file format
+                if primary_group is None:
+                    print("Error parsing FP files! Are files in ./source/traffic_parser/fp_files/"\
+                          " valid?")
+                    exit(GENERAL_ERROR)
 
-                    # Only assign value if it isnt already present to avoid duplicates
-                    if primary_group not in properties_groups[property_name]:
-                        properties_groups[property_name].append(primary_group)
-                else:
-                    properties_groups[property_name] = [primary_group]
+                # Only assign value if it isnt already present to avoid duplicates
+                # There are only a few primary groups, so the list is short
+                property_groups = properties_groups.setdefault(property_name, [])
+                if primary_group not in property_groups:
+                    property_groups.append(primary_group)
 
     return properties_groups
 
@@ -311,51 +307,63 @@ def obtain_fp_groups() -> dict:
         dict: All FPD Groups in a dict with the value of each group being their primary
         parent group (one of the three BrowserProperties, AlgorithmicMethods, CrawlFpInspector) 
     """
-    def get_subgroups(subgroups: list, found_groups: dict, parent: str) -> dict:
-        """Internal fuinction to recursively obtain subgroups of a group and set their parent
-        
-        Args:
-            subgroup: list of subgroups of a given parent group
-            found_groups: dict with existing assigned groups
-            parent: name of the parent class which contains the subgroups
-
-        Returns:
-            dict: Dict with newly assigned parent group
-        """
-
-        # Go through all current-level groups
-        for group in subgroups:
-            group_name = group.get("name")
-            found_groups[group_name] = parent
-
-            next_level_subgroup = group.get("groups", [])
-
-            # Recursively go through all child subgroups
-            if next_level_subgroup:
-                found_groups = get_subgroups(next_level_subgroup, found_groups, parent)
-
-        return found_groups
-
     groups = load_json(FPD_GROUPS_FILE)
 
     # Get groups of the first level (BrowserProperties...)
     first_level_groups = groups.get("groups")
     found_grups = {}
 
-    # Go through all first level groups and set their subgroup parent as the group
-    for top_level_group in first_level_groups:
-        main_group = top_level_group.get("groups", [])
-        parent_name = top_level_group.get("name")
+    # Go through the group tree depth-first using a stack of (group, its primary parent)
+    # First level groups have no primary parent. Children are pushed reversed to keep the order
+    stack = [(top_level_group, None) for top_level_group in reversed(first_level_groups)]
+    while stack:
+        group, parent_name = stack.pop()
+        group_name = group.get("name")
 
         # Set parent of the top level groups as specific value
-        found_grups[parent_name] = TOP_LEVEL_FP_GROUP
+        # All of their subgroups, on every level, have the top level group as parent
+        if parent_name is None:
+            found_grups[group_name] = TOP_LEVEL_FP_GROUP
+            parent_name = group_name
+        else:
+            found_grups[group_name] = parent_name
 
-        # Recursively go through each subgroup
-        if main_group:
-            found_grups = get_subgroups(main_group, found_grups, parent_name)
+        subgroups = group.get("groups", [])
+        stack.extend((subgroup, parent_name) for subgroup in reversed(subgroups))
 
     return found_grups
 
+def init_fp_worker(fp_groups: dict, fp_wrappers: dict) -> None:
+    """Function to set FP groups and wrapped APIs used by load_fp_attempts in this process
+    
+    Args:
+        fp_groups: FP groups loaded from configuration file with primary parents assigned
+        fp_wrappers: Wrapped APIs with assigned primary groups
+    """
+    global worker_fp_groups, worker_fp_wrappers
+    worker_fp_groups = fp_groups
+    worker_fp_wrappers = fp_wrappers
+
+def load_fp_attempts(file: str) -> tuple[str, dict]:
+    """Function to load FP attempts from a given FP file. Expects init_fp_worker
+    was called in this process before.
+    
+    Args:
+        file: Path to the FP file
+
+    Returns:
+        tuple:
+            - str: Name of the corresponding network file
+            - dict: All resources in the FP file with assigned number of FP attempts
+    """
+    pure_filename = os.path.basename(file)
+    corresponding_network_file = get_network_file(pure_filename)
+
+    fp_data = load_json(file)
+
+    return corresponding_network_file, get_fp_attempts(fp_data, worker_fp_groups,\
+                                                        worker_fp_wrappers)
+
 def parse_fp() -> dict:
     """Function to load FP attempts from a corresponding file and
     assign each domain a nuimber of observed attempts.
@@ -380,14 +388,12 @@ def parse_fp() -> dict:
 
     progress_printer = print_progress(len(fp_files), "Loading FP attempts...")
 
-    for file in fp_files:
+    # Files are independent, process them in parallel. Groups and wrappers are passed
+    # to each worker only once
+    for (corresponding_network_file, file_fp_attempts) in parallel_map(load_fp_attempts,\
+                        fp_files, initializer=init_fp_worker, initargs=(fp_groups, fp_wrappers)):
         progress_printer()
-        pure_filename = os.path.basename(file)
-        corresponding_network_file = get_network_file(pure_filename)
-
-        fp_data = load_json(file)
-
-        fp_attempts[corresponding_network_file] = get_fp_attempts(fp_data, fp_groups, fp_wrappers)
+        fp_attempts[corresponding_network_file] = file_fp_attempts
 
     print("Finished assigning FP attempts to each site!")
     return fp_attempts
@@ -16,22 +16,35 @@
 # If not, see <https://www.gnu.org/licenses/>.
 #
 
+# Built-in modules
+from operator import attrgetter
+
 class RequestNode:
     """Class representing each node in the request tree"""
-    def __init__(self, time: str, resource: str, fp_attempts: dict,\
+
+    # Trees can have tens of thousands of nodes, do not create a __dict__ for each of them
+    __slots__ = ("resource", "children", "time", "_time_seconds", "root_node", "repeated",\
+                 "fp_attempts", "blocked", "parents", "_child_resources", "_resource_index")
+
+    def __init__(self, time: float, resource: str, fp_attempts: dict,\
                  children: list["RequestNode"]=None) -> None:
         """Init method for setting up each instance'
         
         Args:
-            time: Time at which network event occured
+            time: Timestamp at which network event occured (a number or a numeric string)
             resource: URL of the loaded resource (requested_resource)
             fp_attempts: FP attempts assigned to this resource
             children: list of children that should have this resource as parent
         """
         self.resource = resource
-        self.children = children
+
+        # Own copy of the children, the given list must not change when children are added
+        self.children = list(children) if children else []
         self.time = time
 
+        # Whole seconds of the time, converted only once since nodes are sorted by it
+        self._time_seconds = int(float(time))
+
         self.root_node = False
         self.repeated = False
 
@@ -42,16 +55,65 @@ class RequestNode:
         # Represents whether this resource would have been blocked or not
         self.blocked = False
 
-        # In case children were specified, correctly set-up the parent-child relation
-        if children:
-            for child in children:
-                child.add_parent(self)
-        else:
-            self.children = []
-
         # New node has initially no parent
         self.parents = []
 
+        # URLs of the children, used to avoid child duplicates
+        self._child_resources = set()
+
+        # Nodes of the whole tree indexed by their URL, shared by all nodes connected together
+        # so the tree can find nodes without walking through it
+        self._resource_index = {resource: [self]}
+
+        # In case children were specified, correctly set-up the parent-child relation
+        self._child_resources.update(child.resource for child in self.children)
+        for child in self.children:
+            self._merge_resource_index(child)
+            child.add_parent(self)
+
+    def restore_relations(self, children: list["RequestNode"], parents: list["RequestNode"],\
+                          resource_index: dict[str, list["RequestNode"]]) -> None:
+        """Method to set the children and parents of the node at once when its tree is restored
+        (e.g. unpickled). Relations are not checked.
+        
+        Args:
+            children: Children of this Node in their original order
+            parents: Parents of this Node in their original order
+            resource_index: Restored index of all nodes of the tree, including this Node
+        """
+        self.children = children
+        self.parents = parents
+        self._child_resources = {child.resource for child in children}
+        self._resource_index = resource_index
+
+    def get_resource_index(self) -> dict[str, list["RequestNode"]]:
+        """Method to return the index of all nodes connected to this node (its tree)
+        
+        Returns:
+            dict: Nodes of the tree indexed by their URL
+        """
+        return self._resource_index
+
+    def _merge_resource_index(self, node: "RequestNode") -> None:
+        """Internal method to join the index of a newly connected node with the index
+        of this node. The smaller index is merged into the larger one.
+        
+        Args:
+            node: Node connected to this Node
+        """
+        index = self._resource_index
+        other_index = node._resource_index
+        if index is other_index:
+            return
+
+        if len(other_index) > len(index):
+            index, other_index = other_index, index
+
+        for (resource, nodes) in other_index.items():
+            index.setdefault(resource, []).extend(nodes)
+            for indexed_node in nodes:
+                indexed_node._resource_index = index
+
     def is_blocked(self) -> bool:
         return self.blocked
 
@@ -68,8 +130,8 @@ class RequestNode:
         # only do this for transitive requests
         if transitive_block:
             should_be_blocked = True
-            for parent in self.get_parents():
-                if not parent.is_blocked():
+            for parent in self.parents:
+                if not parent.blocked:
                     should_be_blocked = False
 
             # Only block if it was not a repeated transitive child and all its parents are blocked
@@ -104,11 +166,11 @@ class RequestNode:
         """
         return self.resource
 
-    def get_time(self) -> str:
+    def get_time(self) -> float:
         """Method to return the timestamp of the resource stored in the node
         
         Returns:
-            str: time at which the network event represented by this Node occured
+            float: time at which the network event represented by this Node occured
         """
         return self.time
 
@@ -128,32 +190,19 @@ class RequestNode:
         """
         return self.children
 
-    def _child_already_present(self, child_node: "RequestNode") -> bool:
-        """Internal method to to avoid child duplicates
-        
-        Args:
-            child_node: RequestNode which is tested if already among children of this Node
-        
-        Returns:
-            bool: If given Node with URL is already a child node of this Node
-        """
-        children = self.get_children()
-        for child in children:
-            if child.get_resource() == child_node.get_resource():
-                return True
-        return False
-
     def add_child(self, child_node: "RequestNode") -> None:
         """"Method to add child node to a parent node
         
         Args:
             child_node: Node to be added as a child of this Node
         """
-        # If the child node is already there, do not repeat
-        if self._child_already_present(child_node):
+        # If the child node with the same URL is already there, do not repeat
+        if child_node.resource in self._child_resources:
             return
 
+        self._child_resources.add(child_node.resource)
         self.children.append(child_node)
+        self._merge_resource_index(child_node)
         child_node.add_parent(self)
 
     def add_parent(self, parent_node: "RequestNode") -> None:
@@ -179,10 +228,10 @@ class RequestNode:
         children = self.get_all_children_nodes()
 
         # Sort the children by time, only do it once here
-        children.sort(key=lambda child: int(child.get_time()))
+        children.sort(key=attrgetter("_time_seconds"))
 
         # Leave only the URLs
-        children = list(map(lambda node: node.get_resource(), children))
+        children = [node.resource for node in children]
         return children
 
     def get_all_children_nodes(self) -> list["RequestNode"]:
@@ -194,13 +243,14 @@ class RequestNode:
         """
         children = []
 
-        # Add the current node resource
-        children.append(self)
-
-        for child in self.get_children():
+        # Go through the subtree depth-first, starting with the current node
+        # Children are pushed reversed so they are visited in their original order
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            children.append(node)
 
             # Add the transitive children (children of children...)
-            transitive_children = child.get_all_children_nodes()
-            children.extend(transitive_children)
+            stack.extend(reversed(node.children))
 
         return children
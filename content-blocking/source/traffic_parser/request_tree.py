@@ -16,6 +16,10 @@
 # If not, see <https://www.gnu.org/licenses/>.
 #
 
+# Built-in modules
+from typing import Iterable
+
+# Custom modules
 from source.traffic_parser.request_node import RequestNode
 from source.utils import add_substract_fp_attempts
 
@@ -33,6 +37,66 @@ class RequestTree:
         """
         self.root_node = root_node
 
+        # Whether the tree is completely built and its nodes won't change anymore
+        self.frozen = False
+
+        # Last resources searched by block_urls and their nodes, kept only for frozen trees
+        self._blocked_search = None
+        self._blocked_search_nodes = {}
+
+    def __getstate__(self) -> dict:
+        """Method to obtain the state of the tree when it is pickled (e.g. sent from a worker
+        process). Nodes are stored as a flat list with relations as indices into it, pickling
+        linked nodes would recurse once per node along each chain of children.
+        
+        Returns:
+            dict: Attributes of the nodes, indices of their children and parents and index
+                  of the root
+        """
+        # Number the nodes in the order of the URL index, so it is restored the same
+        nodes = [node for url_nodes in self.root_node.get_resource_index().values()\
+                 for node in url_nodes]
+        indices = {id(node): index for (index, node) in enumerate(nodes)}
+
+        return {
+            "nodes": [(node.time, node.resource, node.fp_attempts, node.root_node,\
+                       node.repeated, node.blocked) for node in nodes],
+            "children": [[indices[id(child)] for child in node.children] for node in nodes],
+            "parents": [[indices[id(parent)] for parent in node.parents] for node in nodes],
+            "root": indices[id(self.root_node)],
+            "frozen": self.frozen
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """Method to restore the tree from a pickled state. Results of the last block_urls
+        search are not kept.
+        
+        Args:
+            state: State of the tree as returned by __getstate__
+        """
+        nodes = []
+        resource_index = {}
+        for (time, resource, fp_attempts, root_node, repeated, blocked) in state["nodes"]:
+            node = RequestNode(time, resource, fp_attempts)
+            node.root_node = root_node
+            node.repeated = repeated
+            node.blocked = blocked
+            nodes.append(node)
+            resource_index.setdefault(resource, []).append(node)
+
+        for (node, children, parents) in zip(nodes, state["children"], state["parents"]):
+            node.restore_relations([nodes[child] for child in children],\
+                                   [nodes[parent] for parent in parents], resource_index)
+
+        self.root_node = nodes[state["root"]]
+        self.frozen = state["frozen"]
+        self._blocked_search = None
+        self._blocked_search_nodes = {}
+
+    def freeze(self) -> None:
+        """Method to mark the tree as completely built, no nodes should be added to it afterwards"""
+        self.frozen = True
+
     def get_root(self) -> RequestNode:
         """Method to retunr the root of the tree (initial page URL)
         
@@ -50,20 +114,7 @@ class RequestTree:
         Returns:
             dict: Total number of FP attempts associated with Nodes in the tree
         """
-        if start is None:
-            start = self.get_root()
-
-        fpd_attempts = {}
-
-        # Get fpd attempts of starting node
-        fpd_attempts = add_substract_fp_attempts(start.get_fp_attempts(), fpd_attempts)
-
-        # Repeat for all children
-        for child in start.get_children():
-            fpd_attempts = add_substract_fp_attempts(
-                self.total_fpd_attempts(start=child), fpd_attempts)
-
-        return fpd_attempts
+        return self.compute_stats(start)["total_fpd_attempts"]
 
     def first_blocked_fpd_attempts(self, start: RequestNode=None) -> dict:
         """Method to calculate number of FP attempts stopeed at first blocked parent.
@@ -76,22 +127,7 @@ class RequestTree:
         Returns:
             dict: Total number of directly blocked FP attempts
         """
-        if start is None:
-            start = self.get_root()
-
-        blocked_attempts = {}
-
-        # If starting node is blocked, return it as an array
-        if start.is_blocked():
-            blocked_attempts = start.get_fp_attempts()
-            return blocked_attempts
-
-        # If start was not blocked, repeat for all children
-        for child in start.get_children():
-            blocked_attempts = add_substract_fp_attempts(
-                self.first_blocked_fpd_attempts(start=child), blocked_attempts)
-
-        return blocked_attempts
+        return self.compute_stats(start)["first_blocked_fpd_attempts"]
 
     def total_blocked_fpd_attempts(self, start: RequestNode=None) -> dict:
         """Method to calculate total number of FPD attempts blockedd in a tree.
@@ -103,21 +139,7 @@ class RequestTree:
         Returns:
             dict: Total number of directly+transitively blocked FP attempts
         """
-        if start is None:
-            start = self.get_root()
-
-        blocked_attempts = {}
-
-        # If starting node is blocked, return it as an array
-        if start.is_blocked():
-            blocked_attempts = add_substract_fp_attempts(start.get_fp_attempts(), blocked_attempts)
-
-        # Repeat for all children
-        for child in start.get_children():
-            blocked_attempts = add_substract_fp_attempts(
-                self.total_blocked_fpd_attempts(start=child), blocked_attempts)
-
-        return blocked_attempts
+        return self.compute_stats(start)["total_blocked_fpd_attempts"]
 
     def blocked_at_levels(self, start: RequestNode=None, level: int=1) -> list[int]:
         """Method to return levels at which first block in chain was observed
@@ -130,22 +152,7 @@ class RequestTree:
         Returns:
             list: List of levels a blocked node was first encountered at
         """
-        if start is None:
-            start = self.get_root()
-
-        blocked = []
-
-        # If starting node is blocked, return it as an array
-        if start.is_blocked():
-            blocked.append(level)
-            return blocked
-
-        # If start was not blocked, repeat for all children
-        for child in start.get_children():
-            blocked_at_level = self.blocked_at_levels(start=child, level=level+1)
-            blocked.extend(blocked_at_level)
-
-        return blocked
+        return self.compute_stats(start, level)["blocked_at_levels"]
 
     def firstly_blocked(self, start: RequestNode=None) -> list[RequestNode]:
         """Method to compute how many of resources would have been blocked in 
@@ -158,20 +165,7 @@ class RequestTree:
         Returns:
             list: Blocked nodes (without their children)
         """
-        if start is None:
-            start = self.get_root()
-
-        blocked = []
-
-        # If starting node is blocked, return it as an array
-        if start.is_blocked():
-            blocked.append(start)
-            return blocked
-
-        # If start was not blocked, repeat for all children
-        for child in start.get_children():
-            blocked.extend(self.firstly_blocked(start=child))
-        return blocked
+        return self.compute_stats(start)["firstly_blocked"]
 
     def total_blocked(self, start: RequestNode=None) -> int:
         """Method to compute the total number of blocked resources in a tree
@@ -182,20 +176,63 @@ class RequestTree:
         Returns:
             int: Total number of blocked nodes in this tree
         """
-        if start is None:
-            start = self.get_root()
-
-        blocked = 0
+        return self.compute_stats(start)["total_blocked"]
 
-        # Check if the initial node is blocked
-        if start.is_blocked():
-            blocked += 1
+    def compute_stats(self, start: RequestNode=None, level: int=1) -> dict:
+        """Method to compute all blocking statistics of the tree in a single walk. 
+        Each of the single-statistic methods returns the corresponding part of the result.
+        
+        Args:
+            start: Node from which to start computing
+            level: Level the starting node is located at
 
-        # For each child calculate how many of its children are blocked
-        for child in start.get_children():
-            blocked = blocked + self.total_blocked(start=child)
+        Returns:
+            dict: Results of total_fpd_attempts, first_blocked_fpd_attempts, 
+                  total_blocked_fpd_attempts, blocked_at_levels, firstly_blocked and
+                  total_blocked, indexed by the method name
+        """
+        if start is None:
+            start = self.get_root()
 
-        return blocked
+        total_fpd_attempts = {}
+        first_blocked_fpd_attempts = {}
+        total_blocked_fpd_attempts = {}
+        blocked_at_levels = []
+        firstly_blocked = []
+        total_blocked = 0
+
+        # Go depth-first, children are pushed reversed to keep their order
+        # Each node is stored along with its level and whether some node above it was blocked
+        stack = [(start, level, False)]
+        while stack:
+            node, node_level, below_blocked = stack.pop()
+            fp_attempts = node.fp_attempts
+            total_fpd_attempts = add_substract_fp_attempts(fp_attempts, total_fpd_attempts)
+
+            if node.blocked:
+                total_blocked += 1
+                total_blocked_fpd_attempts = add_substract_fp_attempts(\
+                    fp_attempts, total_blocked_fpd_attempts)
+
+                # First blocked node on the path, the nodes below it would not be requested
+                if not below_blocked:
+                    first_blocked_fpd_attempts = add_substract_fp_attempts(\
+                        fp_attempts, first_blocked_fpd_attempts)
+                    blocked_at_levels.append(node_level)
+                    firstly_blocked.append(node)
+                    below_blocked = True
+
+            for child in reversed(node.children):
+                stack.append((child, node_level + 1, below_blocked))
+
+        return {
+            "total_fpd_attempts": total_fpd_attempts,
+            "first_blocked_fpd_attempts": first_blocked_fpd_attempts,
+            "total_blocked_fpd_attempts": total_blocked_fpd_attempts,
+            "blocked_at_levels": blocked_at_levels,
+            "firstly_blocked": firstly_blocked,
+            "total_blocked": total_blocked
+        }
 
     def get_all_requests(self, start_node: RequestNode=None) -> list[str]:
         """Method to recursively get all resources requested on a page
@@ -213,34 +250,39 @@ class RequestTree:
 
         return requests_with_root_as_start
 
-    def _recursive_node_check(self, node: RequestNode, searched_resource: str)\
-        -> list[RequestNode]:
-        """Internal method to recursively check if a resource URL is present in the tree
+    def _reachable_from_root(self, node: RequestNode, excluded_resource: str) -> bool:
+        """Internal method to check if a node can be reached from the root without going
+        through any node of the given URL
         
         Args:
-            node: Node from which to start checking if searched resource is present in the tree
-            searched_resource: URL of the searched resource
+            node: Node which should be reached
+            excluded_resource: URL of the nodes which can't be on the path (except the node itself)
 
         Returns:
-            list: All nodes of which URL matches the searched resource
+            bool: True if there is such path from the root, False otherwise
         """
+        if node is self.root_node:
+            return True
 
-        results = []
+        # Go up through the parents, stop at the nodes of the excluded URL
+        visited = set()
+        stack = list(node.parents)
+        while stack:
+            parent = stack.pop()
+            if parent.resource == excluded_resource or id(parent) in visited:
+                continue
+            if parent is self.root_node:
+                return True
 
-        # The node is what we're searching for - return it immediatly, resource\
-        # can't have itself as a child
-        if node.get_resource() == searched_resource:
-            return [node]
+            visited.add(id(parent))
+            stack.extend(parent.parents)
 
-        # Else recursively continue with children and return all matches
-        for child_node in node.get_children():
-            result = self._recursive_node_check(child_node, searched_resource)
-            if result:
-                results.extend(result)
-        return results
+        return False
 
     def find_nodes(self, searched_resource: str) -> list[RequestNode]:
-        """Method to check if a resource is present in the tree and return nodes that contain it
+        """Method to check if a resource is present in the tree and return nodes that contain it.
+        Nodes below another node of the same URL are left out, a resource can't have itself
+        as a child.
         
         Args:
             searched_resource: URL of the resource searched in the tree
@@ -248,7 +290,93 @@ class RequestTree:
         Returns:
             list: List of Nodes containing the searched resource
         """
-        return self._recursive_node_check(self.get_root(), searched_resource)
+        nodes = self.root_node.get_resource_index().get(searched_resource, [])
+
+        # A single node of the URL can't be below another one
+        if len(nodes) < 2:
+            return list(nodes)
+
+        return [node for node in nodes if self._reachable_from_root(node, searched_resource)]
+
+    def _find_nodes_by_resources(self, searched_resources: frozenset[str])\
+        -> dict[str, list[RequestNode]]:
+        """Internal method to find nodes of multiple resources in a single walk through the tree.
+        Matches are the same (and in the same order) as if find_nodes was called for each resource.
+        
+        Args:
+            searched_resources: URLs of the searched resources
+
+        Returns:
+            dict: Nodes containing each of the found resources, indexed by the resource URL
+        """
+        results = {}
+
+        # Stack of nodes to visit along with resources already matched on the path to them,
+        # since a resource can't have itself as a child
+        stack = [(self.get_root(), frozenset())]
+        while stack:
+            node, matched_on_path = stack.pop()
+            resource = node.resource
+
+            if resource in searched_resources and resource not in matched_on_path:
+                results.setdefault(resource, []).append(node)
+                matched_on_path = matched_on_path | {resource}
+
+            # Reverse children so they are visited in the original (preorder) order
+            for child_node in reversed(node.children):
+                stack.append((child_node, matched_on_path))
+
+        return results
+
+    def block_urls(self, urls: Iterable[str], transitive: bool=False) -> None:
+        """Method to block all nodes containing any of the given resources
+        
+        Args:
+            urls: URLs of the resources to block
+            transitive: Whether children of the blocked nodes should be blocked transitively
+        """
+        urls = list(urls)
+        searched_resources = frozenset(urls)
+
+        # Blocking does not change which nodes match, so in a frozen tree (no nodes are added)
+        # reuse the result when the same resources are blocked again (direct and transitive)
+        if self.frozen and searched_resources == self._blocked_search:
+            nodes_by_resource = self._blocked_search_nodes
+        else:
+            nodes_by_resource = self._find_nodes_by_resources(searched_resources)
+            if self.frozen:
+                self._blocked_search = searched_resources
+                self._blocked_search_nodes = nodes_by_resource
+
+        # Subtrees of the nodes blocked during this call, a node reachable through multiple
+        # parents is found multiple times, but its subtree is only collected once
+        subtree_nodes = {}
+
+        # Process the resources in the given order, the result of transitive blocking
+        # depends on which parents were already blocked
+        for resource in urls:
+            for parent_node in nodes_by_resource.get(resource, []):
+
+                # Mark initial node as blocked
+                parent_node.block()
+
+                if not transitive:
+                    continue
+
+                # Also mark all children as blocked
+                child_nodes = subtree_nodes.get(id(parent_node))
+                if child_nodes is None:
+                    child_nodes = parent_node.get_all_children_nodes()
+                    subtree_nodes[id(parent_node)] = child_nodes
+
+                # If parent was repeated (lowerbound calculation), mark all children as repeated
+                if parent_node.repeated:
+                    for node in child_nodes:
+                        node.repeated = True
+
+                # Try to block all child nodes transitively
+                for node in child_nodes:
+                    node.block(transitive_block=True)
 
     def ascii_tree(self, level: int=1, current_node: RequestNode=None) -> str:
         """Method to return a CLI-visual of the requests in a given tree
@@ -261,21 +389,26 @@ class RequestTree:
             str: The tree visualization as a string
         """
 
-        # Print the initial request - tree root
-        result = ""
-
         if not current_node:
             current_node = self.get_root()
 
-        current_fp_attempts = str(current_node.get_fp_attempts())
-        block_result = "-- Blocked" if current_node.is_blocked() else "-- Loaded"
+        # Collect the lines and join them once at the end
+        lines = []
+
+        # Start with the given node and go depth-first, children are pushed reversed
+        # so they are printed in their original order
+        stack = [(current_node, level)]
+        while stack:
+            node, node_level = stack.pop()
+
+            current_fp_attempts = str(node.get_fp_attempts())
+            block_result = "-- Blocked" if node.is_blocked() else "-- Loaded"
 
-        # Add current level to result
-        result += '\n|' + '--' * 2 * level + ' ' + current_node.get_resource()[:100] + ' '\
-                + block_result + ' ' + current_fp_attempts
+            # Add current level to result
+            lines.append('\n|' + '--' * 2 * node_level + ' ' + node.get_resource()[:100] + ' '\
+                         + block_result + ' ' + current_fp_attempts)
 
-        # Recursively print for children
-        for child in current_node.get_children():
-            result += self.ascii_tree(level=level+1, current_node=child)
+            for child in reversed(node.get_children()):
+                stack.append((child, node_level + 1))
 
-        return result
+        return "".join(lines)
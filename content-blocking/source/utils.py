@@ -16,11 +16,8 @@
 # If not, see <https://www.gnu.org/licenses/>.
 #
 
-# Built-in modules
-import json
-
 # Custom modules
-from source.file_manipulation import get_traffic_files
+from source.file_manipulation import get_traffic_files, load_json
 
 def print_progress(total: int, message: str, limiter=10) -> None:
     """Function utilizing closure mechanism to print progress during for loops
@@ -60,16 +57,15 @@ def squash_dns_records() -> dict:
 
     # Get records from each file and squash them together
     for file in dns_files:
-        with open(file, 'r', encoding='utf-8') as f:
-            dns_json = json.load(f)
-            for (domain, value) in dns_json.items():
+        dns_json = load_json(file)
+        for (domain, subdomains) in dns_json.items():
+            squashed_subdomains = squashed_records.get(domain)
 
-                # Should a key be observed multiple times, overwrite it (should be cached)
-                if not squashed_records.get(domain):
-                    squashed_records[domain] = value
-                else:
-                    for (subdomain, records) in dns_json[domain].items():
-                        squashed_records[domain][subdomain] = records
+            # Should a key be observed multiple times, overwrite it (should be cached)
+            if not squashed_subdomains:
+                squashed_records[domain] = subdomains
+            else:
+                squashed_subdomains.update(subdomains)
 
     return squashed_records
 
@@ -105,8 +101,6 @@ def add_substract_fp_attempts(callers_1: dict, callers_2: dict, add: bool=True)
     Returns:
         dict: Result of the selected operation
     """
-    new_dict = {}
-
     # compatibility fix across analysis
     if isinstance(callers_1, int):
         callers_1 = {}
@@ -115,20 +109,21 @@ def add_substract_fp_attempts(callers_1: dict, callers_2: dict, add: bool=True)
         callers_2 = {}
 
     # Get the dict that is longer (one of them may be empty)
-    longer_callers = callers_1 if len(callers_1.items()) >= len(callers_2.items()) else callers_2
+    if len(callers_1) >= len(callers_2):
+        longer_callers, other_caller = callers_1, callers_2
+    else:
+        longer_callers, other_caller = callers_2, callers_1
 
     # If one of the dicts is empty, return the other
-    if callers_1 == {} or callers_2 == {}:
+    if not other_caller:
         return longer_callers
 
-    other_caller = callers_1 if longer_callers == callers_2 else callers_2
-
     # Else add them together (I assume both have correctly assigned values)
-
-    for (group_name, group_fp_attempts) in longer_callers.items():
-        other_attempts_count = other_caller.get(group_name)
-        if add:
-            new_dict[group_name] = group_fp_attempts + other_attempts_count
-        else:
-            new_dict[group_name] = group_fp_attempts - other_attempts_count
+    new_dict = longer_callers.copy()
+    if add:
+        for (group_name, other_attempts_count) in other_caller.items():
+            new_dict[group_name] += other_attempts_count
+    else:
+        for (group_name, other_attempts_count) in other_caller.items():
+            new_dict[group_name] -= other_attempts_count
     return new_dict
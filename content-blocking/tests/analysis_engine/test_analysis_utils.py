@@ -25,6 +25,7 @@ from source.traffic_parser.create_request_trees import reconstruct_tree
 from source.analysis_engine.analysis_utils import get_directly_blocked_tree
 from source.analysis_engine.analysis_utils import get_transitively_blocked_tree
 from source.analysis_engine.analysis_utils import parse_console_logs_chrome
+from source.analysis_engine.analysis_utils import iter_blocked_pages_chrome
 from source.analysis_engine.analysis_utils import process_firefox_console_output
 from source.file_manipulation import load_json
 
@@ -92,6 +93,16 @@ class TestAnalysisUtils(unittest.TestCase):
         blocked_resources = parse_console_logs_chrome(console_output)
         self.assertEqual(blocked_resources, [])
 
+    def test_iter_blocked_pages_chrome(self):
+        """Test Chrome log parsing generator yields blocked resources lazily"""
+        console_output = [
+            {"level": "SEVERE", "message": "https://a.com/a.js ERR_BLOCKED_BY_ADMINISTRATOR"},
+            {"level": "SEVERE", "message": "https://b.com/b.js ERR_BLOCKED_BY_CLIENT"},
+        ]
+        blocked_resources = iter_blocked_pages_chrome(console_output)
+        self.assertEqual(next(blocked_resources), "https://a.com/a.js")
+        self.assertEqual(list(blocked_resources), ["https://b.com/b.js"])
+
     @patch("source.analysis_engine.analysis_utils.squash_tree_resources")
     def test_process_firefox_console_output(self, mock_tree_resources):
         """Test firefox log parsing"""
@@ -27,6 +27,7 @@ from source.traffic_parser.request_node import RequestNode
 from source.analysis_engine.analysis_utils import get_directly_blocked_tree
 from source.analysis_engine.requests_analysis import calculate_really_blocked_requests
 from source.analysis_engine.experimental_analysis import calculate_average_block_level
+from source.analysis_engine.experimental_analysis import average_of_block_levels
 from source.analysis_engine.experimental_analysis import calculate_blocked_who_brings_children
 from source.analysis_engine.experimental_analysis import add_subtrees
 from source.analysis_engine.experimental_analysis import analyse_subtrees_blocking
@@ -189,3 +190,8 @@ class TestExperimentalAnalysis(unittest.TestCase):
 
         average_blocks = calculate_average_block_level(directly_blocked_tree)
         self.assertEqual(average_blocks, 4)
+
+    def test_average_of_block_levels(self):
+        """Test average of block levels, no blocks give 0"""
+        self.assertEqual(average_of_block_levels([2, 3, 7]), 4)
+        self.assertEqual(average_of_block_levels([]), 0)
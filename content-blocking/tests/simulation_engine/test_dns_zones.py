@@ -33,7 +33,7 @@ class TestDNSRepeater(unittest.TestCase):
         self.dns_repeater = DNSRepeater(None)
         self.dns_repeater.docker_client = MagicMock()
         self.dns_repeater.container = MagicMock()
-        self.dns_repeater.original_config = "original_config"
+        self.dns_repeater.original_config = b"original_config"
         self.dns_repeater.tar_file = "zones.tar"
         self.dns_repeater.tar_path = "./" + self.dns_repeater.tar_file
 
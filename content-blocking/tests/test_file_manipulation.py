@@ -22,6 +22,7 @@ from unittest.mock import patch, mock_open
 
 # Custom modules
 from source.file_manipulation import load_json, save_json, load_pages, get_traffic_files
+from source.file_manipulation import dump_json, parse_json
 
 class TestFileManipulation(unittest.TestCase):
 
@@ -43,18 +44,69 @@ class TestFileManipulation(unittest.TestCase):
         expected = {"key": "value"}
         self.assertEqual(load_json("test.json"), expected)
 
+    @patch("builtins.open", mock_open(read_data='{"key": "value"}'))
+    @patch("source.file_manipulation.orjson", None)
+    def test_load_json_without_orjson(self):
+        """Test load_json falls back to the json module if orjson is not installed"""
+        expected = {"key": "value"}
+        self.assertEqual(load_json("test.json"), expected)
+
+    def test_parse_json(self):
+        """Test JSON given as a string is parsed"""
+        self.assertEqual(parse_json('{"key": ["value"]}'), {"key": ["value"]})
+
+    @patch("source.file_manipulation.orjson", None)
+    def test_parse_json_without_orjson(self):
+        """Test parse_json falls back to the json module if orjson is not installed"""
+        self.assertEqual(parse_json('{"key": ["value"]}'), {"key": ["value"]})
+
     @patch("builtins.open")
     def test_load_json_file_not_found(self, mock_open_function):
         mock_open_function.side_effect = OSError()
         with self.assertRaises(SystemExit):
             load_json("test.json")
 
-    @patch("builtins.open", mock_open())
-    @patch("json.dump")
-    def test_save_json(self, mock_json_dump):
+    @patch("builtins.open", new_callable=mock_open)
+    @patch("source.file_manipulation.orjson", None)
+    @patch("json.dumps")
+    def test_save_json(self, mock_json_dumps, mock_open_function):
+        mock_json_dumps.return_value = '{"key": "value"}'
         data = {"key": "value"}
         save_json(data, "test.json")
-        mock_json_dump.assert_called_once()
+        mock_json_dumps.assert_called_once()
+        mock_open_function().write.assert_called_once_with(b'{"key": "value"}')
+
+    @patch("source.file_manipulation.orjson", None)
+    def test_dump_json_without_orjson(self):
+        """Test dump_json falls back to the json module and returns UTF-8 bytes"""
+        self.assertEqual(dump_json({"key": "ř"}), '{\n    "key": "ř"\n}'.encode('utf-8'))
+
+    @patch("builtins.open", new_callable=mock_open)
+    @patch("source.file_manipulation.orjson")
+    def test_save_json_indented(self, mock_orjson, mock_open_function):
+        """Test indented JSON is always serialized by the json module with 4 spaces"""
+        save_json({"key": "ř"}, "test.json")
+        mock_orjson.dumps.assert_not_called()
+        mock_open_function.assert_called_once_with("test.json", 'wb')
+        mock_open_function().write.assert_called_once_with('{\n    "key": "ř"\n}'.encode('utf-8'))
+
+    def test_dump_json_ensure_ascii(self):
+        """Test non-ASCII characters are escaped if requested"""
+        self.assertEqual(dump_json({"key": "ř"}, ensure_ascii=True), b'{\n    "key": "\\u0159"\n}')
+        self.assertEqual(dump_json({"key": "ř"}, indent=False, ensure_ascii=True),\
+                         b'{"key":"\\u0159"}')
+
+    def test_dump_json_without_indent_backends(self):
+        """Test compact JSON is the same with and without orjson"""
+        data = {"key": ["ř", 1.5, None, {"1": True}]}
+        with patch("source.file_manipulation.orjson", None):
+            without_orjson = dump_json(data, indent=False)
+        self.assertEqual(dump_json(data, indent=False), without_orjson)
+
+    @patch("source.file_manipulation.orjson", None)
+    def test_dump_json_without_indent(self):
+        """Test dump_json without indentation contains no whitespace"""
+        self.assertEqual(dump_json({"key": [1, 2]}, indent=False), b'{"key":[1,2]}')
 
     @patch("builtins.open")
     def test_save_json_file_error(self, mock_open_function):
@@ -68,6 +120,12 @@ class TestFileManipulation(unittest.TestCase):
         files = get_traffic_files('dns')
         self.assertIn("./traffic/1_dns.json", files)
 
+    @patch("os.listdir")
+    def test_get_traffic_files_only_matching(self, mock_listdir):
+        mock_listdir.return_value = ["1_fp.json", "2_network.json", "fp.json.crdownload", ".empty"]
+        files = get_traffic_files('fp')
+        self.assertEqual(files, ["./traffic/1_fp.json"])
+
     @patch("os.listdir")
     def test_get_traffic_files_error(self, mock_listdir):
         mock_listdir.return_value =["1_fp.json", "1_dns.json", "1_network.json", ".empty"]
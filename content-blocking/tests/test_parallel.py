@@ -0,0 +1,52 @@
+# test_parallel.py
+# Test functions in parallel.py
+# Copyright (C) 2025 Vojtěch Fiala
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with this program.
+# If not, see <https://www.gnu.org/licenses/>.
+#
+
+# Built-in modules
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Custom modules
+from source.parallel import parallel_map
+
+class TestParallel(unittest.TestCase):
+
+    @patch("source.parallel.ProcessPoolExecutor")
+    def test_parallel_map_few_items(self, mock_executor):
+        """Test few items are processed directly without starting worker processes"""
+        initializer = MagicMock()
+        result = parallel_map(str, [1, 2], initializer=initializer, initargs=("a",))
+
+        self.assertEqual(list(result), ["1", "2"])
+        initializer.assert_called_once_with("a")
+        mock_executor.assert_not_called()
+
+    @patch("os.cpu_count")
+    @patch("source.parallel.ProcessPoolExecutor")
+    def test_parallel_map(self, mock_executor, mock_cpu_count):
+        """Test many items are processed by the worker processes, keeping their order"""
+        mock_cpu_count.return_value = 4
+        items = list(range(64))
+        executor = MagicMock()
+        executor.map.return_value = iter([str(item) for item in items])
+        mock_executor.return_value.__enter__.return_value = executor
+
+        result = list(parallel_map(str, items, initargs=("a",)))
+
+        self.assertEqual(result, [str(item) for item in items])
+        mock_executor.assert_called_once_with(initializer=None, initargs=("a",))
+        executor.map.assert_called_once()
@@ -19,11 +19,12 @@
 
 # Built-in modules
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # 3rd party modules
 from scapy.layers.dns import DNS, DNSQR, DNSRR
 from scapy.layers.inet import IP, UDP
+from scapy.layers.inet6 import IPv6
 from scapy.layers.l2 import Ether
 from scapy.packet import Packet
 
@@ -97,6 +98,30 @@ class TestDNSSniffer(unittest.TestCase):
         self.assertIn(test_packet, self.dns_sniffer_class.packets)
         self.assertEqual(len(self.dns_sniffer_class.packets), 1)
 
+    @patch("source.traffic_logger.dns_observer.time.sleep")
+    def test_wait_for_packets(self, mock_sleep):
+        """Check waiting ends once no new packet is stored"""
+        self.dns_sniffer_class.sniffer = MagicMock(running=True)
+        test_packet = self._craft_dns_packet("test.example.com",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+
+        # One packet arrives during the first wait, none during the second
+        stored = iter([test_packet])
+        mock_sleep.side_effect = lambda _: [self.dns_sniffer_class.store_packet(packet)\
+                                            for packet in stored]
+
+        self.dns_sniffer_class.wait_for_packets()
+
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(self.dns_sniffer_class.packets, [test_packet])
+
+    @patch("source.traffic_logger.dns_observer.time.sleep")
+    def test_wait_for_packets_not_running(self, mock_sleep):
+        """Check there is no waiting if the sniffer does not run"""
+        self.dns_sniffer_class.sniffer = MagicMock(running=False)
+        self.dns_sniffer_class.wait_for_packets()
+        mock_sleep.assert_not_called()
+
     def test_get_traffic(self):
         """Check if packets are parsed on getting them"""
         test_packet = self._craft_dns_packet("test.example.com",\
@@ -107,6 +132,67 @@ class TestDNSSniffer(unittest.TestCase):
         self.assertIn("example.com", dns_results)
         self.assertIn("test", dns_results["example.com"])
 
+    def test_get_traffic_malformed_packet(self):
+        """Check malformed packets are skipped and the rest is still parsed"""
+        malformed_packet = self._craft_dns_packet("test.example.com",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+        malformed_packet[DNSQR].qname = b"\xfftest.example.org."
+        test_packet = self._craft_dns_packet("test.example.com",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+        self.dns_sniffer_class.store_packet(malformed_packet)
+        self.dns_sniffer_class.store_packet(test_packet)
+
+        with patch("builtins.print") as mock_print:
+            dns_results = self.dns_sniffer_class.get_traffic()
+        self.assertNotIn("example.org", dns_results)
+        self.assertIn("test", dns_results["example.com"])
+        self.assertEqual(self.dns_sniffer_class.skipped_packets, 1)
+        mock_print.assert_called_once_with("Skipped 1 malformed DNS packet(s)")
+
+    def test_get_traffic_error_not_hidden(self):
+        """Check errors other than malformed packets are not silently skipped"""
+        test_packet = self._craft_dns_packet("test.example.com",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+        self.dns_sniffer_class.store_packet(test_packet)
+
+        with patch.object(self.dns_sniffer_class, "_save_dns_answer", side_effect=KeyError):
+            with self.assertRaises(KeyError):
+                self.dns_sniffer_class.get_traffic()
+
+    def test_get_traffic_ipv6(self):
+        """Check responses over IPv6 are parsed and queries without answers
+        (only filtered by port for IPv6) are skipped"""
+        response = Ether() / IPv6(src="2001:db8::1", dst="2001:db8::2") /\
+                   UDP(sport=53, dport=4242) /\
+                   DNS(qr=1, qd=DNSQR(qname="test.example.com"), ancount=1,\
+                       an=[DNSRR(type=1, rdata="192.168.0.1")])
+        query = Ether() / IPv6(src="2001:db8::1", dst="2001:db8::2") /\
+                UDP(sport=53, dport=4242) / DNS(qd=DNSQR(qname="query.example.org"))
+        self.dns_sniffer_class.store_packet(response)
+        self.dns_sniffer_class.store_packet(query)
+
+        dns_results = self.dns_sniffer_class.get_traffic()
+        self.assertEqual(list(dns_results), ["example.com"])
+        self.assertEqual(dns_results["example.com"]["test"]["A"], ["192.168.0.1"])
+
+    def test_get_traffic_since(self):
+        """Check only packets captured since the given time are parsed and all are consumed"""
+        old_packet = self._craft_dns_packet("old.example.org",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+        old_packet.time = 100
+        test_packet = self._craft_dns_packet("test.example.com",\
+                        a_replies=["192.168.0.1"], cname_replies=[])
+        test_packet.time = 200
+        self.dns_sniffer_class.store_packet(old_packet)
+        self.dns_sniffer_class.store_packet(test_packet)
+
+        dns_results = self.dns_sniffer_class.get_traffic(since=150)
+        self.assertEqual(list(dns_results), ["example.com"])
+        self.assertEqual(self.dns_sniffer_class.packets, [])
+
+        # Responses of the previous call are not returned again
+        self.assertEqual(self.dns_sniffer_class.get_traffic(), {})
+
     def test_subdomains_obtaining(self):
         """Test _obtain_subdomains() works as intended"""
 
@@ -124,6 +210,25 @@ class TestDNSSniffer(unittest.TestCase):
         self.assertEqual(primary_zone, "example.com")
         self.assertEqual(subdomains, "example.com")
 
+    def test_split_domain(self):
+        """Test split_domain() keeps all lower-level subdomains together"""
+        primary_zone, subdomains = dns_observer.split_domain("a.b.c.tracking.example.com")
+
+        self.assertEqual(primary_zone, "example.com")
+        self.assertEqual(subdomains, "a.b.c.tracking")
+
+    def test_split_domain_single_label(self):
+        """Test single-label name is used as both the zone and the record"""
+        primary_zone, subdomains = dns_observer.split_domain("localhost")
+
+        self.assertEqual(primary_zone, "localhost")
+        self.assertEqual(subdomains, "localhost")
+
+    def test_decode_domain_name(self):
+        """Test domain names from packets are decoded without the trailing dot"""
+        self.assertEqual(dns_observer.decode_domain_name(b"www.example.com."), "www.example.com")
+        self.assertEqual(dns_observer.decode_domain_name(b"www.example.com"), "www.example.com")
+
     def test_record_assigning(self):
         """Test _process_dns_answers() correctly returns A and CNAME records"""
 
@@ -44,6 +44,16 @@ class TestNetworkLogsLoader(unittest.TestCase):
                         "https://fit.vut.cz"}}
         self.assertFalse(is_internal_network_event(log))
 
+    def test_is_internal_network_event_prefix(self):
+        """Test only URLs starting with the internal schemes are flagged"""
+        log = {"params": {"request": {"url": "https://vut.cz/?next=chrome://settings"},\
+                        "documentURL": "https://vut.cz"}}
+        self.assertFalse(is_internal_network_event(log))
+
+        log = {"params": {"request": {"url": "https://vut.cz"}, "documentURL":\
+                        "devtools://devtools/bundled/inspector.html"}}
+        self.assertTrue(is_internal_network_event(log))
+
     def test_last_valid_parent(self):
         """Test that last valid parent is correctly obtained"""
         # Stack can have parents, in that case I want the last caller that is valid
@@ -23,6 +23,7 @@ from unittest.mock import patch, MagicMock
 # Custom modules
 from source.traffic_logger.traffic_loader import visit_page, save_traffic, delete_unsuccesfull_fpd
 from source.traffic_logger.traffic_loader import match_jshelter_fpd, get_page_logs, load_traffic
+from source.traffic_logger.traffic_loader import is_dns_valid, get_address
 
 class TestTrafficLoader(unittest.TestCase):
     @patch("source.traffic_logger.traffic_loader.get_page_network_traffic")
@@ -62,26 +63,35 @@ class TestTrafficLoader(unittest.TestCase):
         self.assertEqual(network_traffic, [])
 
     @patch("builtins.open")
-    @patch("json.dumps")
+    @patch("source.traffic_logger.traffic_loader.dump_json")
     @patch("source.traffic_logger.traffic_loader.delete_unsuccesfull_fpd")
-    def test_save_traffic_dns(self, mock_delete_fpd, mock_json_dumps, mock_open):
+    def test_save_traffic_dns(self, mock_delete_fpd, mock_dump_json, mock_open):
         """Test saving traffic success"""
         traffic_data = {'dns': True}
         save_traffic(traffic_data, "https://example.com", "1", "dns")
-        mock_open.assert_called_once_with("./traffic/1_dns.json", "w", encoding="utf-8")
-        mock_json_dumps.assert_called_once_with(traffic_data, indent=4)
-        mock_open().write.assert_called_once()
+        mock_open.assert_called_once_with("./traffic/1_dns.json", "wb")
+        mock_dump_json.assert_called_once_with(traffic_data, indent=True, ensure_ascii=True)
+        mock_open().__enter__().write.assert_called_once_with(mock_dump_json.return_value)
 
     @patch("builtins.open")
-    @patch("json.dumps")
+    @patch("source.traffic_logger.traffic_loader.dump_json")
     @patch("source.traffic_logger.traffic_loader.delete_unsuccesfull_fpd")
-    def test_save_traffic_network(self, mock_delete_fpd, mock_json_dumps, mock_open):
+    def test_save_traffic_network(self, mock_delete_fpd, mock_dump_json, mock_open):
         """Test saving traffic success"""
         traffic_data = {'network': True}
         save_traffic(traffic_data, "https://example.com", "1", "network")
-        mock_open.assert_called_once_with("./traffic/1_network.json", "w", encoding="utf-8")
-        mock_json_dumps.assert_called_once_with(traffic_data, indent=4)
-        mock_open().write.assert_called_once()
+        mock_open.assert_called_once_with("./traffic/1_network.json", "wb")
+        mock_dump_json.assert_called_once_with(traffic_data, indent=True, ensure_ascii=True)
+        mock_open().__enter__().write.assert_called_once_with(mock_dump_json.return_value)
+
+    @patch("builtins.open")
+    @patch("source.traffic_logger.traffic_loader.dump_json")
+    @patch("source.traffic_logger.traffic_loader.delete_unsuccesfull_fpd")
+    def test_save_traffic_compact(self, mock_delete_fpd, mock_dump_json, mock_open):
+        """Test compact traffic is saved without indentation"""
+        traffic_data = {'dns': True}
+        save_traffic(traffic_data, "https://example.com", "1", "dns", compact=True)
+        mock_dump_json.assert_called_once_with(traffic_data, indent=False, ensure_ascii=False)
 
     @patch("builtins.open")
     @patch("builtins.exit")
@@ -97,6 +107,40 @@ class TestTrafficLoader(unittest.TestCase):
         mock_exit.assert_called_once()
         mock_delete.assert_called_once()
 
+    def test_get_address(self):
+        """Test domain is obtained from the URL"""
+        self.assertEqual(get_address("https://www.example.com/script.js"), "www.example.com")
+        self.assertEqual(get_address("https://example.com/a//b/"), "example.com")
+
+    def test_get_address_invalid(self):
+        """Test empty domain is returned if the URL has no path"""
+        self.assertEqual(get_address("https://example.com"), "")
+
+    def test_is_dns_valid(self):
+        """Test DNS is valid and unrelated zones are removed, zones of CNAMEs are kept"""
+        dns_traffic = {
+            "example.com": {"www": {"A": [], "CNAME": ["cdn.example.net"]},
+                            "example.com": {"A": ["1.1.1.1"], "CNAME": []}},
+            "example.net": {"cdn": {"A": ["2.2.2.2"], "CNAME": []}},
+            "unrelated.org": {"unrelated.org": {"A": ["3.3.3.3"], "CNAME": []}}
+        }
+        network_traffic = [{"requested_resource": "https://www.example.com/"},
+                           {"requested_resource": "https://www.example.com/script.js"},
+                           {"requested_resource": "https://example.com/"},
+                           {"requested_resource": "data:image/png;base64,"}]
+
+        status, dns_logs = is_dns_valid(dns_traffic, network_traffic)
+        self.assertTrue(status)
+        self.assertEqual(list(dns_logs), ["example.com", "example.net"])
+
+    def test_is_dns_valid_missing_dns(self):
+        """Test DNS is invalid when a requested domain has no DNS record"""
+        dns_traffic = {"example.com": {"www": {"A": ["1.1.1.1"], "CNAME": []}}}
+        network_traffic = [{"requested_resource": "https://www.example.com/"},
+                           {"requested_resource": "https://api.example.com/"}]
+
+        self.assertEqual(is_dns_valid(dns_traffic, network_traffic), (False, {}))
+
     @patch("os.listdir")
     @patch("os.remove")
     def test_delete_unsuccessful_fpd(self, mock_remove, mock_listdir):
@@ -142,8 +186,13 @@ class TestTrafficLoader(unittest.TestCase):
 
         self.assertEqual(dns, {"dns": "data"})
         self.assertEqual(network, ["test_network_data"])
-        mock_sniffer.start_sniffer.assert_called_once()
-        mock_sniffer.stop_sniffer.assert_called_once()
+        mock_sniffer.get_traffic.assert_called_once()
+        self.assertIn("since", mock_sniffer.get_traffic.call_args.kwargs)
+        # Packets must be stored before they are parsed
+        self.assertEqual([call[0] for call in mock_sniffer.method_calls[-2:]],\
+                         ["wait_for_packets", "get_traffic"])
+        mock_sniffer.start_sniffer.assert_not_called()
+        mock_sniffer.stop_sniffer.assert_not_called()
 
     @patch("source.traffic_logger.traffic_loader.visit_page")
     @patch("source.traffic_logger.traffic_loader.DNSSniffer")
@@ -156,7 +205,7 @@ class TestTrafficLoader(unittest.TestCase):
 
         self.assertEqual(dns, {})
         self.assertEqual(network, [])
-        mock_sniffer.stop_sniffer.assert_called_once()
+        mock_sniffer.get_traffic.assert_not_called()
 
     @patch("source.traffic_logger.traffic_loader.load_pages")
     @patch("source.traffic_logger.traffic_loader.get_page_logs")
@@ -182,6 +231,25 @@ class TestTrafficLoader(unittest.TestCase):
         mock_save.assert_called()
         mock_match.assert_called()
         mock_validity.assert_called_once()
+        mock_sniffer_class.assert_called_once()
+        mock_sniffer_class.return_value.start_sniffer.assert_called_once()
+        mock_sniffer_class.return_value.stop_sniffer.assert_called_once()
+
+    @patch("source.traffic_logger.traffic_loader.load_pages")
+    @patch("source.traffic_logger.traffic_loader.get_page_logs")
+    @patch("source.traffic_logger.traffic_loader.DNSSniffer")
+    def test_load_traffic_interrupted(self, mock_sniffer_class, mock_get_logs, mock_load_pages):
+        """Test the sniffer is stopped even if the logging is interrupted"""
+        mock_get_logs.side_effect = KeyboardInterrupt
+        mock_load_pages.return_value = ["https://example.com"]
+        class MockConfig:
+            max_repeat_log_attempts = 2
+            no_dns_validation_during_logging = False
+
+        with self.assertRaises(KeyboardInterrupt):
+            load_traffic(MockConfig(), compact=False)
+
+        mock_sniffer_class.return_value.stop_sniffer.assert_called_once()
 
     @patch("source.traffic_logger.traffic_loader.load_pages")
     @patch("source.traffic_logger.traffic_loader.get_page_logs")
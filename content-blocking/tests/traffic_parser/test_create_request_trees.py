@@ -17,6 +17,8 @@
 #
 
 # Built-in modules
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -26,10 +28,10 @@ from source.traffic_parser.request_tree import RequestTree
 from source.traffic_parser.create_request_trees import fix_missing_parent, join_call_frames
 from source.traffic_parser.create_request_trees import assign_parent_from_callstack
 from source.traffic_parser.create_request_trees import add_new_root_node, assign_direct_parent
-from source.traffic_parser.create_request_trees import create_trees, load_network_traffic_files
+from source.traffic_parser.create_request_trees import create_trees, build_tree, init_tree_worker
 from source.traffic_parser.create_request_trees import has_direct_initiator, has_stack_specified
 from source.traffic_parser.create_request_trees import is_root_node
-from source.file_manipulation import load_json
+from source.file_manipulation import load_json, save_json
 
 class TestcreateRequestTrees(unittest.TestCase):
 
@@ -157,6 +159,17 @@ class TestcreateRequestTrees(unittest.TestCase):
                     "https://b.cz/sc.js", "chrome-extension://nn/test"]
         self.assertEqual(result, expected)
 
+    def test_join_call_frames_deep_parents(self):
+        """Test call frames are joined even for parent chains deeper than the recursion limit"""
+        stack = {"callFrames": [{"url": "https://a.cz/0.js"}]}
+        for i in range(1, 5000):
+            stack = {"parent": stack, "callFrames": [{"url": f"https://a.cz/{i}.js"}]}
+
+        result = join_call_frames(stack)
+        self.assertEqual(len(result), 5000)
+        self.assertEqual(result[0], "https://a.cz/0.js")
+        self.assertEqual(result[-1], "https://a.cz/4999.js")
+
     def test_add_new_root_node_first_request(self):
         """Test adding new node when it's the first requestt correctly creates tree"""
         fp_attempts = self.parsed_fp_attempts[self.test_network_traffic_file]
@@ -347,20 +360,24 @@ class TestcreateRequestTrees(unittest.TestCase):
                                     self.root_node, new_node)
         self.assertIn(new_node, self.root_node.get_children())
 
-    @patch("source.traffic_parser.create_request_trees.get_traffic_files")
     @patch("source.traffic_parser.create_request_trees.load_json")
-    def test_load_network_traffic_files(self, mock_load_json, mock_get_files):
-        """Test load_network_traffic_files work as it should"""
-        mock_get_files.return_value = [self.test_network_traffic_file]
+    def test_build_tree(self, mock_load_json):
+        """Test build_tree loads the traffic file and reconstructs the tree of the set type"""
         mock_load_json.return_value = self.traffic
-        result = load_network_traffic_files()
-        self.assertEqual(len(result), 1)
-        self.assertEqual(result[0][1], self.test_network_traffic_file)
+        init_tree_worker(True)
+        tree = build_tree(("./traffic/log_1_network.json", {}))
+        init_tree_worker(False)
 
-    @patch("source.traffic_parser.create_request_trees.load_network_traffic_files")
-    def test_create_trees(self, mock_load_files):
+        mock_load_json.assert_called_once_with("./traffic/log_1_network.json")
+        self.assertIsInstance(tree, RequestTree)
+        self.assertEqual(len(tree.get_all_requests()), 6)
+
+    @patch("source.traffic_parser.create_request_trees.get_traffic_files")
+    @patch("source.traffic_parser.create_request_trees.load_json")
+    def test_create_trees(self, mock_load_json, mock_get_files):
         """Test trees are created correctly"""
-        mock_load_files.return_value = [(self.traffic, "log_1_network.json")]
+        mock_get_files.return_value = ["./traffic/log_1_network.json"]
+        mock_load_json.return_value = self.traffic
         options = MagicMock()
         options.lower_bound_trees = False
         trees = create_trees(self.parsed_fp_attempts, options)
@@ -379,9 +396,39 @@ class TestcreateRequestTrees(unittest.TestCase):
         expected = {"BrowserProperties": 21, "AlgorithmicMethods": 0}
         self.assertEqual(fp_attempts, expected)
 
-    @patch("source.traffic_parser.create_request_trees.load_network_traffic_files")
-    def test_create_trees_lower_bound(self, mock_load_files):
-        mock_load_files.return_value = [(self.traffic, "log_1_network.json")]
+    @patch("source.parallel.os.cpu_count", return_value=2)
+    @patch("source.parallel.PARALLEL_MIN_TASKS", 1)
+    @patch("source.traffic_parser.create_request_trees.get_traffic_files")
+    def test_create_trees_parallel_deep_tree(self, mock_get_files, _):
+        """Test trees deeper than the recursion limit are sent back from the worker processes"""
+        depth = 1200
+        deep_traffic = [{"requested_for": "https://a.cz/", "time": 1,\
+                         "requested_resource": "https://a.cz/", "initiator": {"type": "other"}}]
+        for level in range(1, depth):
+            deep_traffic.append({"requested_for": "https://a.cz/", "time": 1,\
+                                 "requested_resource": f"https://a.cz/{level}.js",\
+                                 "initiator": {"type": "script",\
+                                 "url": deep_traffic[-1]["requested_resource"]}})
+
+        with tempfile.TemporaryDirectory() as traffic_folder:
+            deep_file = os.path.join(traffic_folder, "deep_network.json")
+            example_file = os.path.join(traffic_folder, "example_network.json")
+            save_json(deep_traffic, deep_file)
+            save_json(self.traffic, example_file)
+            mock_get_files.return_value = [deep_file, example_file]
+
+            options = MagicMock()
+            options.lower_bound_trees = False
+            trees = create_trees({}, options)
+
+        self.assertEqual(len(trees["deep_network.json"].get_all_requests()), depth)
+        self.assertEqual(len(trees["example_network.json"].get_all_requests()), 8)
+
+    @patch("source.traffic_parser.create_request_trees.get_traffic_files")
+    @patch("source.traffic_parser.create_request_trees.load_json")
+    def test_create_trees_lower_bound(self, mock_load_json, mock_get_files):
+        mock_get_files.return_value = ["./traffic/log_1_network.json"]
+        mock_load_json.return_value = self.traffic
         options = MagicMock()
         options.lower_bound_trees = True
         trees = create_trees(self.parsed_fp_attempts, options)
@@ -22,10 +22,10 @@ from unittest.mock import patch
 
 # Custom modules
 from source.traffic_parser.fp_attempts import get_primary_groups, construct_default_fp_value
-from source.traffic_parser.fp_attempts import parse_callers, get_fp_attempts
+from source.traffic_parser.fp_attempts import parse_callers, get_fp_attempts, parse_last_caller
 from source.traffic_parser.fp_attempts import get_network_file, assign_property_group
 from source.traffic_parser.fp_attempts import obtain_fp_groups, parse_property_logs
-from source.traffic_parser.fp_attempts import parse_fp
+from source.traffic_parser.fp_attempts import parse_fp, init_fp_worker, load_fp_attempts
 
 class TestFPAttempts(unittest.TestCase):
     def test_get_primary_groups(self):
@@ -46,7 +46,7 @@ class TestFPAttempts(unittest.TestCase):
         self.assertEqual(construct_default_fp_value(primary_groups), expected_output)
 
     @patch("builtins.open")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_assign_property_group(self, mock_json_load, mock_open):
         """Test property groups are correctly assigned"""
         fp_groups = {"BrowserProperties": "TOP_LEVEL", "NavigatorBasic": "BrowserProperties"}
@@ -58,7 +58,7 @@ class TestFPAttempts(unittest.TestCase):
         self.assertEqual(result, {"Navigator.prototype.languages": ["BrowserProperties"]})
 
     @patch("builtins.open")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_assign_property_group_primary(self, mock_json_load, mock_open):
         """Test property groups are correctly assigned for primary parents"""
         fp_groups = {"BrowserProperties": "TOP_LEVEL", "NavigatorBasic": "BrowserProperties"}
@@ -71,7 +71,7 @@ class TestFPAttempts(unittest.TestCase):
 
     @patch("builtins.open")
     @patch("builtins.exit")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_assign_property_group_invalid(self, mock_json_load, mock_exit, mock_open):
         """Test property groups returns empty value for unknown primary group 
         should not happen, indicates invalid groups or wrappers file"""
@@ -84,7 +84,7 @@ class TestFPAttempts(unittest.TestCase):
 
     @patch("builtins.open")
     @patch("builtins.exit")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_assign_property_group_two_groups(self, mock_json_load, mock_exit, mock_open):
         """Test property groups has correctly assigned two groups 
         should not happen, indicates invalid groups or wrappers file"""
@@ -100,7 +100,7 @@ class TestFPAttempts(unittest.TestCase):
                                 ["BrowserProperties", "CrawlFpInspector"]})
 
     @patch("builtins.open")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_obtain_fp_groups(self, mock_json_load, mock_open):
         "Test FP APIs are correctly assigned their primary group"
         groups_data = {"groups": [{"name": "BrowserProperties", \
@@ -112,7 +112,7 @@ class TestFPAttempts(unittest.TestCase):
                                   "BrowserProperties"})
         
     @patch("builtins.open")
-    @patch("json.load")
+    @patch("source.traffic_parser.fp_attempts.load_json")
     def test_obtain_fp_groups_subgroups(self, mock_json_load, mock_open):
         "Test FP APIs are correctly assigned their primary group even recursively"
         groups_data = {"groups": [{"name": "BrowserProperties", \
@@ -124,6 +124,19 @@ class TestFPAttempts(unittest.TestCase):
         self.assertEqual(result, {"BrowserProperties": "TOP_LEVEL", "NavigatorBasic": \
                                   "BrowserProperties", "InsideProperty": "BrowserProperties"})
 
+    def test_parse_last_caller(self):
+        """Test URL is extracted from the last line of the callstack"""
+        self.assertEqual(parse_last_caller("    at https://c.cz/script.js:330:440"),\
+                        "https://c.cz/script.js")
+        self.assertEqual(parse_last_caller("    at Object.apply (https://c.cz/a.js:1:2)"),\
+                        "https://c.cz/a.js")
+
+    def test_parse_last_caller_anonymous(self):
+        """Test URL of the script is extracted from an anonymous eval caller"""
+        last_caller = "    at eval (eval at <anonymous> (https://www.final.org/b/index.js:1:19566), \
+<anonymous>:3988:11188)"
+        self.assertEqual(parse_last_caller(last_caller), "https://www.final.org/b/index.js")
+
     def test_parse_callers_anonymous_end(self):
         """Test parse_callers works as intended"""
         all_callers = {"Error: FPDCallerTracker\n  at https://www.test.org/a/index.js:1:19566\n \
@@ -186,6 +199,27 @@ class TestFPAttempts(unittest.TestCase):
         fp_logs = parse_property_logs(primary_group, property_logs, fp_logs, all_primary_groups)
         self.assertEqual(expected_output, fp_logs)
 
+    def test_parse_property_logs_unknown_group(self):
+        """Test API without an assigned primary group is skipped"""
+        property_logs = {"set":{"args":{"":18},"total":18,"callers":{}}}
+        fp_logs = {}
+        all_primary_groups = ["BrowserProperties", "AlgorithmicMethods"]
+        fp_logs = parse_property_logs(None, property_logs, fp_logs, all_primary_groups)
+        self.assertEqual({}, fp_logs)
+
+    def test_parse_callers_two_groups(self):
+        """Test parse_callers counts the attempt in each of the assigned primary groups"""
+        all_callers = {"Error: FPDCallerTracker\n    at https://c.cz/script.js:330:440": True}
+        fp_logs = {}
+        primary_group = ["BrowserProperties", "AlgorithmicMethods"]
+        all_primary_groups = ["BrowserProperties", "AlgorithmicMethods", "CrawlFpInspector"]
+        expected_output = {
+            "https://c.cz/script.js": {"BrowserProperties": 1, "AlgorithmicMethods": 1,\
+                                       "CrawlFpInspector": 0}
+        }
+        self.assertEqual(parse_callers(all_callers, fp_logs, primary_group, all_primary_groups),\
+                        expected_output)
+
     def test_parse_callers_not_anonymous_end(self):
         all_callers = {"Error: FPDCallerTracker\n    at Navigator.replacementPD \
         (chrome-extension://a:970:11)\n    at Object.apply (chrome-extension://a:405:25)\n \
@@ -248,6 +282,21 @@ class TestFPAttempts(unittest.TestCase):
         """Test that invalid files throw an erorr"""
         self.assertRaises(BaseException, get_network_file("1_fp_test.json"))
 
+    @patch("source.traffic_parser.fp_attempts.load_json")
+    @patch("source.traffic_parser.fp_attempts.get_fp_attempts")
+    def test_load_fp_attempts(self, mock_get_fp_attempts, mock_load_json):
+        """Test FP file is parsed using groups and wrappers set for the worker"""
+        fp_groups = {"BrowserProperties": "TOP_LEVEL"}
+        fp_wrappers = {"Navigator.prototype.plugins": ["BrowserProperties"]}
+        mock_get_fp_attempts.return_value = {"https://a.cz/": {"BrowserProperties": 1}}
+
+        init_fp_worker(fp_groups, fp_wrappers)
+        result = load_fp_attempts("./traffic/1_fp.json")
+
+        self.assertEqual(result, ("1_network.json", {"https://a.cz/": {"BrowserProperties": 1}}))
+        mock_get_fp_attempts.assert_called_once_with(mock_load_json.return_value, fp_groups,\
+                                                     fp_wrappers)
+
     @patch("source.traffic_parser.fp_attempts.get_traffic_files")
     @patch("source.traffic_parser.fp_attempts.get_network_file")
     @patch("source.traffic_parser.fp_attempts.load_json")
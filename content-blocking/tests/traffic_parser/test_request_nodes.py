@@ -57,6 +57,52 @@ class TestRequestNode(unittest.TestCase):
         node_4 = RequestNode("8", "https://example.com/d.js", {}, children=[self.node_3])
         self.assertIn(self.node_3, node_4.get_children())
 
+    def test_add_duplicate_of_default_child(self):
+        """Test Node with the same resource as one of the specified children is not added"""
+        node_4 = RequestNode("8", "https://example.com/d.js", {}, children=[self.node_3])
+        node_4.add_child(self.node_duplicated)
+        self.assertEqual(node_4.get_children(), [self.node_3])
+        self.assertEqual(self.node_3.get_parents(), [node_4])
+
+    def test_default_children_list_copied(self):
+        """Test adding a child does not modify the list of children given to the Node"""
+        default_children = [self.node_3]
+        node_4 = RequestNode("8", "https://example.com/d.js", {}, children=default_children)
+        node_4.add_child(self.node_2)
+        self.assertEqual(default_children, [self.node_3])
+        self.assertEqual(node_4.get_children(), [self.node_3, self.node_2])
+
+    def test_fractional_time(self):
+        """Test children are ordered by whole seconds of a fractional timestamp"""
+        node_4 = RequestNode("1.5", "https://example.com/d.js", {})
+        node_5 = RequestNode(0.9, "https://example.com/e.js", {})
+        self.node_1.add_child(node_4)
+        self.node_1.add_child(node_5)
+        self.assertEqual(node_4.get_time(), "1.5")
+        self.assertEqual(self.node_1.get_all_children_resources(),\
+                         ["https://example.com/e.js", "https://example.com/a.js",\
+                          "https://example.com/d.js"])
+
+    def test_resource_index(self):
+        """Test connected nodes share a single index of nodes by their URL"""
+        self.node_1.add_child(self.node_2)
+        self.node_3.add_child(self.node_duplicated)
+        self.node_2.add_child(self.node_3)
+
+        index = self.node_1.get_resource_index()
+        self.assertEqual(index, {"https://example.com/a.js": [self.node_1],\
+                                 "https://example.com/b.js": [self.node_2],\
+                                 "https://example.com/c.js": [self.node_3, self.node_duplicated]})
+        for node in [self.node_2, self.node_3, self.node_duplicated]:
+            self.assertIs(node.get_resource_index(), index)
+
+    def test_resource_index_default_children(self):
+        """Test children specified at initialization share the index with the node"""
+        self.node_2.add_child(self.node_3)
+        node_4 = RequestNode("8", "https://example.com/d.js", {}, children=[self.node_2])
+        self.assertIs(node_4.get_resource_index(), self.node_3.get_resource_index())
+        self.assertEqual(node_4.get_resource_index()["https://example.com/d.js"], [node_4])
+
     def test_blocking(self):
         """Test if a node can be blocked"""
         self.node_1.block()
@@ -122,3 +168,26 @@ class TestRequestNode(unittest.TestCase):
         self.assertEqual(len(expected_nodes), len(children_nodes))
         for node in expected_nodes:
             self.assertIn(node, expected_nodes)
+
+    def test_get_all_children_nodes_order(self):
+        """Test get_all_children_nodes returns the nodes in depth-first order"""
+        self.node_1.add_child(self.node_2)
+        self.node_2.add_child(self.node_3)
+        self.node_1.add_child(self.node_duplicated)
+        children_nodes = self.node_1.get_all_children_nodes()
+        expected_nodes = [self.node_1, self.node_2, self.node_3, self.node_duplicated]
+
+        self.assertEqual(expected_nodes, children_nodes)
+
+    def test_restore_relations(self):
+        """Test restored children and parents are set as given, with the given index"""
+        resource_index = {"https://example.com/a.js": [self.node_1]}
+        self.node_1.restore_relations([self.node_2], [self.node_duplicated], resource_index)
+
+        self.assertEqual(self.node_1.get_children(), [self.node_2])
+        self.assertEqual(self.node_1.get_parents(), [self.node_duplicated])
+        self.assertIs(self.node_1.get_resource_index(), resource_index)
+
+        # Restored child is not added again
+        self.node_1.add_child(RequestNode("8", "https://example.com/b.js", {}))
+        self.assertEqual(self.node_1.get_children(), [self.node_2])
@@ -16,7 +16,9 @@
 # If not, see <https://www.gnu.org/licenses/>.
 #
 
+import pickle
 import unittest
+from unittest.mock import patch
 from source.traffic_parser.request_node import RequestNode
 from source.traffic_parser.request_tree import RequestTree
 
@@ -100,6 +102,20 @@ class TestRequestTree(unittest.TestCase):
         blocked_nodes = self.tree.firstly_blocked()
         self.assertEqual(blocked_nodes, [self.child_1])
 
+    def test_compute_stats(self):
+        """Test all statistics are computed correctly in a single walk"""
+        self.child_1.block()
+        self.child_3.block()
+        self.child_of_duplicate.block()
+
+        stats = self.tree.compute_stats()
+        self.assertEqual(stats["total_fpd_attempts"], {"BrowserProperties": 8})
+        self.assertEqual(stats["first_blocked_fpd_attempts"], {"BrowserProperties": 4})
+        self.assertEqual(stats["total_blocked_fpd_attempts"], {"BrowserProperties": 7})
+        self.assertEqual(stats["blocked_at_levels"], [3, 4])
+        self.assertEqual(stats["firstly_blocked"], [self.child_1, self.child_of_duplicate])
+        self.assertEqual(stats["total_blocked"], 4)
+
     def test_find_nodes(self):
         """Test node can be found by URL"""
         result = self.tree.find_nodes("https://www.example.com/c.css")
@@ -115,6 +131,84 @@ class TestRequestTree(unittest.TestCase):
         result = self.tree.find_nodes("https://www.example.com/api/d.js")
         self.assertEqual(result, [self.child_3, self.child_duplicate])
 
+    def test_find_nodes_not_below_same_url(self):
+        """Test nodes below another node of the same URL are not found"""
+        nested_node = RequestNode("7", "https://www.example.com/b.js", {})
+        self.child_3.add_child(nested_node)
+        self.assertEqual(self.tree.find_nodes("https://www.example.com/b.js"), [self.child_1])
+
+        # Node is found if it can also be reached without going through the same URL
+        self.child_2.add_child(nested_node)
+        self.assertEqual(self.tree.find_nodes("https://www.example.com/b.js"),\
+                         [self.child_1, nested_node])
+
+    def test_find_nodes_added_subtree(self):
+        """Test nodes of a subtree added to the tree can be found"""
+        subtree_root = RequestNode("7", "https://www.example.com/e.js", {})
+        subtree_child = RequestNode("8", "https://www.example.com/f.js", {})
+        subtree_root.add_child(subtree_child)
+        self.child_2.add_child(subtree_root)
+        self.assertEqual(self.tree.find_nodes("https://www.example.com/f.js"), [subtree_child])
+
+    def test_block_urls(self):
+        """Test all nodes of given URLs are blocked at once"""
+        self.tree.block_urls(["https://www.example.com/api/d.js", "https://www.example.com/c.css"])
+        self.assertTrue(self.child_2.is_blocked())
+        self.assertTrue(self.child_3.is_blocked())
+        self.assertTrue(self.child_duplicate.is_blocked())
+        self.assertFalse(self.child_1.is_blocked())
+        self.assertFalse(self.child_of_duplicate.is_blocked())
+
+    def test_block_urls_transitive(self):
+        """Test children are blocked transitively only if all their parents are blocked"""
+        self.tree.block_urls(["https://www.example.com/b.js"], transitive=True)
+        self.assertTrue(self.child_3.is_blocked())
+        self.assertFalse(self.child_of_duplicate.is_blocked())
+
+        self.tree.block_urls(["https://www.example.com/api/d.js"], transitive=True)
+        self.assertTrue(self.child_of_duplicate.is_blocked())
+
+    def test_block_urls_subtree_collected_once(self):
+        """Test subtree of a node found through multiple parents is collected once per call"""
+        with patch.object(RequestNode, "get_all_children_nodes", autospec=True,\
+                          side_effect=RequestNode.get_all_children_nodes) as mock_subtree:
+            self.tree.block_urls(["https://www.example.com/dupe.js"], transitive=True)
+            self.assertEqual(mock_subtree.call_count, 1)
+
+            self.tree.block_urls(["https://www.example.com/dupe.js"], transitive=True)
+            self.assertEqual(mock_subtree.call_count, 2)
+        self.assertTrue(self.child_of_duplicate.is_blocked())
+
+    def test_block_urls_subtree_not_kept(self):
+        """Test children added after blocking are blocked by the next call"""
+        self.tree.block_urls(["https://www.example.com/b.js"], transitive=True)
+        new_child = RequestNode("7", "https://www.example.com/e.js", {})
+        self.child_3.add_child(new_child)
+
+        self.tree.block_urls(["https://www.example.com/b.js"], transitive=True)
+        self.assertTrue(new_child.is_blocked())
+
+    def test_block_urls_search_reused(self):
+        """Test nodes of a frozen tree are searched once when the same URLs are blocked again"""
+        urls = ["https://www.example.com/b.js"]
+        self.tree.freeze()
+        with patch.object(self.tree, "_find_nodes_by_resources",\
+                          wraps=self.tree._find_nodes_by_resources) as mock_find:
+            self.tree.block_urls(urls)
+            self.tree.block_urls(urls, transitive=True)
+            mock_find.assert_called_once()
+        self.assertTrue(self.child_3.is_blocked())
+
+    def test_block_urls_search_after_new_child(self):
+        """Test nodes of a tree being built are searched again, a node may have been added"""
+        urls = ["https://www.example.com/b.js"]
+        self.tree.block_urls(urls)
+        new_child = RequestNode("7", "https://www.example.com/b.js", {})
+        self.child_2.add_child(new_child)
+
+        self.tree.block_urls(urls)
+        self.assertTrue(new_child.is_blocked())
+
     def test_get_all_requests(self):
         """Test all requested resources are obtained corretly, including  duplicates"""
         requests = self.tree.get_all_requests()
@@ -156,3 +250,49 @@ class TestRequestTree(unittest.TestCase):
         self.assertIn("https://www.example.com/c.css", output)
         self.assertIn("https://www.example.com/api/d.js", output)
         self.assertIn("https://www.example.com/dupe.js", output)
+
+    def test_pickle(self):
+        """Test unpickled tree keeps its structure, flags and index of the nodes"""
+        self.child_3.block()
+        self.child_duplicate.repeated = True
+        unpickled_tree = pickle.loads(pickle.dumps(self.tree))
+
+        root = unpickled_tree.get_root()
+        self.assertTrue(root.root_node)
+        self.assertEqual(root.get_all_children_resources(), self.root.get_all_children_resources())
+        self.assertEqual(unpickled_tree.ascii_tree(), self.tree.ascii_tree())
+        self.assertEqual(unpickled_tree.get_all_requests(), self.tree.get_all_requests())
+        self.assertFalse(unpickled_tree.frozen)
+
+        (child_3,) = unpickled_tree.find_nodes("https://www.example.com/b.js")[0].get_children()
+        (_, _, child_duplicate) = root.get_children()[0].get_children()
+        self.assertTrue(child_3.is_blocked())
+        self.assertTrue(child_duplicate.repeated)
+
+        # Node with multiple parents is still a single node with parents in the same order
+        child_of_duplicate = child_duplicate.get_children()[0]
+        self.assertIs(child_3.get_children()[0], child_of_duplicate)
+        self.assertEqual(child_of_duplicate.get_parents(), [child_duplicate, child_3])
+        self.assertEqual(unpickled_tree.find_nodes("https://www.example.com/api/d.js"),\
+                         [child_3, child_duplicate])
+        self.assertIs(child_of_duplicate.get_resource_index(), root.get_resource_index())
+
+    def test_pickle_frozen(self):
+        """Test unpickled frozen tree stays frozen"""
+        self.tree.freeze()
+        unpickled_tree = pickle.loads(pickle.dumps(self.tree))
+
+        self.assertTrue(unpickled_tree.frozen)
+        self.assertEqual(len(unpickled_tree.find_nodes("https://www.example.com/api/d.js")), 2)
+
+    def test_pickle_deep_tree(self):
+        """Test tree deeper than the recursion limit can be pickled"""
+        # Build the chain top-down, the way trees are reconstructed
+        node = self.child_2
+        for depth in range(5000):
+            child = RequestNode("7", f"https://www.example.com/{depth}.js", {})
+            node.add_child(child)
+            node = child
+
+        unpickled_tree = pickle.loads(pickle.dumps(self.tree))
+        self.assertEqual(unpickled_tree.get_all_requests(), self.tree.get_all_requests())